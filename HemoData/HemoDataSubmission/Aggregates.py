@@ -0,0 +1,211 @@
+import argparse
+from datetime import datetime
+
+import Config
+from DBBackend import BACKENDS, DuckDBBackend, SQLServerBackend, get_backend
+
+# ---------------------------------------------
+# DASHBOARD SEGMENTS
+# ---------------------------------------------
+TENURE_BAND = """
+    CASE WHEN f.tenure <= 12 THEN '0-12 months'
+         WHEN f.tenure <= 24 THEN '13-24 months'
+         WHEN f.tenure <= 48 THEN '25-48 months'
+         ELSE '49+ months' END
+"""
+
+# dimension name -> segment expression over the fact (f) and service (s) rows
+SEGMENTS = {
+    "overall": "'All customers'",
+    "contract": "f.contract",
+    "payment_method": "f.payment_method",
+    "tenure_band": TENURE_BAND,
+    "internet_service": "s.internet_service",
+}
+
+# Additive measures, so new facts are folded into the stored totals
+SEGMENT_QUERY = """
+    SELECT '{dimension}', COALESCE({segment}, 'Unknown'),
+           COUNT(*),
+           SUM(CAST(f.churn AS INT)),
+           SUM(CAST(s.monthly_charges AS FLOAT)),
+           SUM(CASE WHEN CAST(f.churn AS INT) = 1 THEN CAST(s.monthly_charges AS FLOAT) ELSE 0 END)
+    FROM telco.fact_subscription f
+    JOIN telco.dim_service s ON f.service_dim_id = s.service_dim_id
+    WHERE f.fact_id > {after}
+    {group_by}
+"""
+
+# SQLite and DuckDB declare these in their schema files
+AGGREGATES_DDL_SQLSERVER = """
+    IF OBJECT_ID('telco.agg_churn_segment', 'U') IS NULL
+    CREATE TABLE telco.agg_churn_segment (
+        dimension       VARCHAR(30),
+        segment         VARCHAR(100),
+        customers       INT,
+        churned         INT,
+        churn_rate      FLOAT,
+        monthly_revenue DECIMAL(14, 2),
+        revenue_at_risk DECIMAL(14, 2),
+        refreshed_at    DATETIME2,
+        PRIMARY KEY (dimension, segment)
+    );
+    IF OBJECT_ID('telco.agg_refresh', 'U') IS NULL
+    CREATE TABLE telco.agg_refresh (
+        max_fact_id  INT,
+        fact_count   INT,
+        refreshed_at DATETIME2
+    );
+"""
+
+# ---------------------------------------------
+# COVERING INDEXES FOR THE STAR JOIN
+# ---------------------------------------------
+# Every fact column the dashboard and fetch_data read, so a join on either
+# foreign key is answered from the index without touching the base table
+FACT_INDEXES = {
+    "ix_fact_subscription_customer": "customer_dim_id",
+    "ix_fact_subscription_service": "service_dim_id",
+}
+FACT_COVERED = [
+    "customer_dim_id", "service_dim_id", "tenure", "contract", "paperless_billing",
+    "payment_method", "total_charges", "churn"
+]
+
+
+def index_ddl(backend):
+    statements = []
+    for name, key in FACT_INDEXES.items():
+        covered = ", ".join(c for c in FACT_COVERED if c != key)
+        if isinstance(backend, SQLServerBackend):
+            statements.append(f"""
+                IF NOT EXISTS (SELECT 1 FROM sys.indexes
+                               WHERE name = '{name}' AND object_id = OBJECT_ID('telco.fact_subscription'))
+                CREATE NONCLUSTERED INDEX {name} ON telco.fact_subscription ({key}) INCLUDE ({covered})
+            """)
+        elif isinstance(backend, DuckDBBackend):
+            # Column store: scans already skip by zone map, and an ART index only slows the bulk loads
+            continue
+        else:
+            # No INCLUDE in SQLite: trailing key columns make the index covering
+            statements.append(f"CREATE INDEX IF NOT EXISTS telco.{name} ON fact_subscription ({key}, {covered})")
+    return statements
+
+
+def create_indexes(backend, cursor):
+    for sql in index_ddl(backend):
+        cursor.execute(sql)
+
+
+# ---------------------------------------------
+# REFRESH (NEW FACTS ONLY, OR REBUILD)
+# ---------------------------------------------
+def read_rows(cursor, sql, *params):
+    cursor.execute(sql, params) if params else cursor.execute(sql)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def segment_totals(cursor, after):
+    # SQL Server will not GROUP BY a constant, so the overall row is a plain aggregate
+    query = " UNION ALL ".join(
+        SEGMENT_QUERY.format(dimension=dimension, segment=segment, after=after,
+                             group_by="" if dimension == "overall" else f"GROUP BY COALESCE({segment}, 'Unknown')")
+        for dimension, segment in SEGMENTS.items()
+    )
+    return {
+        (dimension, segment): [int(customers), int(churned or 0), float(revenue or 0), float(at_risk or 0)]
+        for dimension, segment, customers, churned, revenue, at_risk in read_rows(cursor, query)
+        if customers
+    }
+
+
+def refresh_aggregates(backend, conn, full=False, metrics=None):
+    """Bring telco.agg_churn_segment up to date with telco.fact_subscription.
+
+    Facts appended since the last refresh are aggregated and added to the stored
+    totals. Anything else (deleted facts, or full=True after a MERGE load that may
+    have updated facts in place) rebuilds the table. Returns (action, new facts).
+    Facts aggregated plus segment rows written are charged to metrics, if given.
+    """
+    cursor = conn.cursor()
+    try:
+        if isinstance(backend, SQLServerBackend):
+            cursor.execute(AGGREGATES_DDL_SQLSERVER)
+        create_indexes(backend, cursor)
+
+        max_fact_id, fact_count = read_rows(cursor, """
+            SELECT COALESCE(MAX(fact_id), 0), COUNT(*) FROM telco.fact_subscription
+        """)[0]
+        state = read_rows(cursor, "SELECT max_fact_id, fact_count FROM telco.agg_refresh")
+
+        after = 0
+        if state and not full:
+            after, counted = state[0]
+            if (after, counted) == (max_fact_id, fact_count):
+                return "current", 0
+
+        delta = segment_totals(cursor, after)
+        new_facts = sum(v[0] for (dimension, _), v in delta.items() if dimension == "overall")
+
+        # Appends only: every fact not yet counted must be above the old watermark
+        incremental = after > 0 and state[0][1] + new_facts == fact_count
+        if incremental:
+            stored = read_rows(cursor, """
+                SELECT dimension, segment, customers, churned, monthly_revenue, revenue_at_risk
+                FROM telco.agg_churn_segment
+            """)
+            totals = {(d, s): [int(c), int(ch), float(r), float(a)] for d, s, c, ch, r, a in stored}
+        else:
+            if after > 0:
+                delta = segment_totals(cursor, 0)
+            totals = {}
+            cursor.execute("DELETE FROM telco.agg_churn_segment")
+
+        now = datetime.now()
+        for key, (customers, churned, revenue, at_risk) in delta.items():
+            row = totals.get(key)
+            if row is None:
+                cursor.execute("""
+                    INSERT INTO telco.agg_churn_segment
+                        (dimension, segment, customers, churned, churn_rate, monthly_revenue, revenue_at_risk, refreshed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (*key, customers, churned, churned / customers, revenue, at_risk, now))
+                continue
+
+            customers, churned = row[0] + customers, row[1] + churned
+            cursor.execute("""
+                UPDATE telco.agg_churn_segment
+                SET customers = ?, churned = ?, churn_rate = ?, monthly_revenue = ?, revenue_at_risk = ?,
+                    refreshed_at = ?
+                WHERE dimension = ? AND segment = ?
+            """, (customers, churned, churned / customers, row[2] + revenue, row[3] + at_risk, now, *key))
+
+        cursor.execute("DELETE FROM telco.agg_refresh")
+        cursor.execute("INSERT INTO telco.agg_refresh (max_fact_id, fact_count, refreshed_at) VALUES (?, ?, ?)",
+                       (int(max_fact_id), int(fact_count), now))
+        conn.commit()
+
+        facts = new_facts if incremental else int(fact_count)
+        if metrics:
+            metrics.add_rows(facts + len(delta))
+            metrics.add_round_trip(len(delta))
+            metrics.add_commit()
+
+        return ("incremental" if incremental else "rebuilt"), facts
+    finally:
+        cursor.close()
+
+
+# ------------------------------------------------------
+# MAIN EXECUTION
+# ------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the churn dashboard aggregates and fact indexes.")
+    parser.add_argument("--full", action="store_true", help="rebuild instead of adding new facts")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=Config.DB_BACKEND)
+    args = parser.parse_args()
+
+    backend = get_backend(args.backend)
+    with backend.connection() as conn:
+        action, facts = refresh_aggregates(backend, conn, full=args.full)
+    print(f"Aggregates {action} ({facts} facts).")
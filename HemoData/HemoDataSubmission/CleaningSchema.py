@@ -0,0 +1,196 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import Config
+
+# ---------------------------------------------
+# TELCO CSV SCHEMA
+# ---------------------------------------------
+# type:  "id"       stripped string
+#        "flag"     int8 through `mapping`
+#        "category" pandas categorical over a fixed `domain`
+#        "number"   parsed into `dtype`, optionally bounded by `min`
+# null:  "reject" (quarantine the row) or the value to fill in
+YES_NO = {"Yes": 1, "No": 0}
+PHONE_ADDON = ["No", "No phone service", "Yes"]
+INTERNET_ADDON = ["No", "No internet service", "Yes"]
+
+TELCO_SCHEMA = {
+    "customerID":       {"type": "id", "null": "reject"},
+    "gender":           {"type": "category", "domain": ["Female", "Male"], "null": "reject"},
+    "SeniorCitizen":    {"type": "flag", "mapping": {"1": 1, "0": 0}, "null": "reject"},
+    "Partner":          {"type": "flag", "mapping": YES_NO, "null": "reject"},
+    "Dependents":       {"type": "flag", "mapping": YES_NO, "null": "reject"},
+    "tenure":           {"type": "number", "dtype": "int16", "min": 0, "null": "reject"},
+    "PhoneService":     {"type": "flag", "mapping": YES_NO, "null": "reject"},
+    "MultipleLines":    {"type": "category", "domain": PHONE_ADDON, "null": "reject"},
+    "InternetService":  {"type": "category", "domain": ["DSL", "Fiber optic", "No"], "null": "reject"},
+    "OnlineSecurity":   {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "OnlineBackup":     {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "DeviceProtection": {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "TechSupport":      {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "StreamingTV":      {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "StreamingMovies":  {"type": "category", "domain": INTERNET_ADDON, "null": "reject"},
+    "Contract":         {"type": "category", "domain": ["Month-to-month", "One year", "Two year"], "null": "reject"},
+    "PaperlessBilling": {"type": "flag", "mapping": YES_NO, "null": "reject"},
+    "PaymentMethod":    {"type": "category", "domain": [
+        "Bank transfer (automatic)", "Credit card (automatic)", "Electronic check", "Mailed check"
+    ], "null": "reject"},
+    "MonthlyCharges":   {"type": "number", "dtype": "float32", "min": 0, "null": "reject"},
+    # Blank only for customers in their first month (tenure 0): nothing billed yet.
+    # Anything else that does not parse is quarantined, not zeroed.
+    "TotalCharges":     {"type": "number", "dtype": "float32", "min": 0, "null": 0},
+    "Churn":            {"type": "flag", "mapping": YES_NO, "null": "reject"},
+}
+
+
+def read_dtypes(schema=TELCO_SCHEMA):
+    # Low-cardinality columns are parsed straight into categoricals; numbers stay
+    # text until cleaned so a bad value is quarantined instead of failing the read
+    return {
+        name: "category" if spec["type"] in ("flag", "category") else str
+        for name, spec in schema.items()
+    }
+
+
+CSV_DTYPES = read_dtypes()
+
+# Sentinels in the per-category lookup tables
+_NULL, _INVALID = -1, -2
+
+
+# ---------------------------------------------
+# ONE VECTORIZED PASS PER COLUMN
+# ---------------------------------------------
+def _category_lookup(col, table_for):
+    # Work on the (few) distinct categories, then gather through the integer codes
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype("category")
+    categories = col.cat.categories.astype(str).str.strip()
+    table = np.array([_NULL if c == "" else table_for(c) for c in categories] + [_NULL], dtype=np.int16)
+    # NaN has code -1, which lands on the trailing _NULL entry
+    return table[col.cat.codes.to_numpy()]
+
+
+def _is_text(col):
+    # object on pandas < 3, the str dtype from pandas 3 on
+    return pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col)
+
+
+def _clean_column(col, spec):
+    kind = spec["type"]
+
+    if kind == "id":
+        values = (col if _is_text(col) else col.astype(str)).str.strip()
+        return values, (values.isna() | (values == "")).to_numpy(), np.zeros(len(col), dtype=bool)
+
+    if kind == "flag":
+        mapping = spec["mapping"]
+        codes = _category_lookup(col, lambda c: mapping.get(c, _INVALID))
+        null, invalid = codes == _NULL, codes == _INVALID
+        if spec["null"] != "reject":
+            codes = np.where(null, spec["null"], codes)
+            null = np.zeros(len(col), dtype=bool)
+        return np.where(null | invalid, 0, codes).astype(np.int8), null, invalid
+
+    if kind == "category":
+        domain = spec["domain"]
+        index = {v: i for i, v in enumerate(domain)}
+        codes = _category_lookup(col, lambda c: index.get(c, _INVALID))
+        null, invalid = codes == _NULL, codes == _INVALID
+        if spec["null"] != "reject":
+            codes = np.where(null, index[spec["null"]], codes)
+            null = np.zeros(len(col), dtype=bool)
+        codes = np.where(null | invalid, -1, codes)
+        return pd.Categorical.from_codes(codes, categories=domain), null, invalid
+
+    # number
+    if _is_text(col):
+        text = col.str.strip()
+        blank = (col.isna() | (text == "")).to_numpy()
+        values = pd.to_numeric(text, errors="coerce").to_numpy(dtype="float64")
+    else:
+        blank = col.isna().to_numpy()
+        values = col.to_numpy(dtype="float64")
+
+    invalid = np.isnan(values) & ~blank
+    if "min" in spec:
+        invalid |= values < spec["min"]
+    if np.issubdtype(np.dtype(spec["dtype"]), np.integer):
+        invalid |= ~np.isnan(values) & (values % 1 != 0)
+
+    if spec["null"] != "reject":
+        values = np.where(blank, spec["null"], values)
+        blank = np.zeros(len(col), dtype=bool)
+    values = np.where(blank | invalid, 0, values)
+    return values.astype(spec["dtype"]), blank, invalid
+
+
+def clean(df, schema=TELCO_SCHEMA):
+    # Returns (clean rows in compact dtypes, rejected raw rows + reject_reason).
+    # The index is kept: downstream checkpoints use it as the CSV row number.
+    missing = [name for name in schema if name not in df.columns]
+    if missing:
+        raise KeyError(f"CSV is missing schema columns: {missing}")
+
+    cleaned = {}
+    failures = []
+    for name in df.columns:
+        if name not in schema:
+            cleaned[name] = df[name]
+            continue
+        cleaned[name], null, invalid = _clean_column(df[name], schema[name])
+        failures.append((f"{name}: missing", null))
+        failures.append((f"{name}: invalid", invalid))
+
+    out = pd.DataFrame(cleaned, index=df.index)
+
+    bad = np.zeros(len(df), dtype=bool)
+    for _, mask in failures:
+        bad |= mask
+    if not bad.any():
+        return out, df.iloc[:0].assign(reject_reason=pd.Series(dtype=str))
+
+    rejected = df[bad].copy()
+    reasons = pd.Series("", index=rejected.index)
+    for reason, mask in failures:
+        hit = mask[bad]
+        if hit.any():
+            reasons[hit] = reasons[hit].where(reasons[hit] == "", reasons[hit] + "; ") + reason
+    rejected["reject_reason"] = reasons
+
+    return out[~bad], rejected
+
+
+# ---------------------------------------------
+# QUARANTINE FILE (+ COUNTS) PER SOURCE AND RUN
+# ---------------------------------------------
+def quarantine(rejected, source, run_id, written, directory=Config.QUARANTINE_DIR):
+    # written: the caller's set of files this run has started, so later chunks append
+    if rejected.empty:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.splitext(os.path.basename(source or "extract"))[0]
+    path = os.path.join(directory, f"{name}.{run_id}.rejected.csv")
+    counts_path = os.path.join(directory, f"{name}.{run_id}.counts.json")
+
+    first = path not in written
+    written.add(path)
+    rejected.to_csv(path, mode="w" if first else "a", header=first, index_label="csv_row")
+
+    counts = {}
+    if not first and os.path.exists(counts_path):
+        with open(counts_path) as f:
+            counts = json.load(f)
+    counts["rows"] = counts.get("rows", 0) + len(rejected)
+    for reasons in rejected["reject_reason"]:
+        for reason in reasons.split("; "):
+            counts[reason] = counts.get(reason, 0) + 1
+    with open(counts_path, "w") as f:
+        json.dump(counts, f, indent=2)
+
+    print(f"Quarantined {len(rejected)} rows from {source or 'extract'} -> {path}")
+    return path
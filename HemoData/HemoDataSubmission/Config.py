@@ -6,3 +6,50 @@ RECIPIENT_EMAIL = "test@hemodata.com"
 
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 465
+
+# Bulk loading: rows sent per executemany round-trip
+BATCH_SIZE = 10000
+FAST_EXECUTEMANY = True
+
+# Streaming mode: CSV rows read and cleaned per chunk
+CHUNK_SIZE = 100000
+
+# Schema-driven cleaning: rejected CSV rows (+ counts per reason) per source file
+QUARANTINE_DIR = "quarantine"
+
+# Validation before loading: error rows are quarantined; above this share of
+# rejected rows the load stops. TotalCharges may differ from tenure x
+# MonthlyCharges by this fraction (plus one month) before it is reported.
+VALIDATION_MAX_REJECT_PCT = 5.0
+CHARGES_TOLERANCE = 0.25
+
+# Checkpointing: fact rows committed per batch with their watermark (0 = one commit per stage)
+CHECKPOINT_SIZE = 100000
+
+# Parallel multi-file loads (None = one worker per CPU core)
+PARALLEL_WORKERS = None
+DB_POOL_SIZE = 4
+
+# Per-stage metrics: JSON lines next to etl_log.txt, optional Prometheus textfile
+METRICS_PATH = "etl_metrics.jsonl"
+PROMETHEUS_TEXTFILE = None
+# Tracing every allocation slows the load several-fold: turn it on only to profile memory
+METRICS_TRACE_MEMORY = False
+
+# Database backend: "sqlserver", "sqlite" or "duckdb" (shared by the ETL and the ML scripts)
+DB_BACKEND = "sqlserver"
+SQLSERVER_CONN_STRING = (
+    r"Driver={ODBC Driver 17 for SQL Server};"
+    r"Server=MSI\SQLEXPRESS;"
+    r"Database=HemoData_Telco_DB;"
+    r"Trusted_Connection=yes;"
+)
+SQLITE_PATH = "telco.db"
+DUCKDB_PATH = "telco_dw.duckdb"   # not "telco": DuckDB names the catalog after the file
+
+# Error alerts: identical tracebacks are emailed at most once per window (repeats
+# are summarised), and at most ALERT_MAX_PER_MINUTE emails go out per minute
+ALERT_DEDUP_SECONDS = 300
+ALERT_MAX_PER_MINUTE = 6
+ALERT_SMTP_SSL = True
+ALERT_SMTP_IDLE_SECONDS = 60
@@ -0,0 +1,207 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
+import Config
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---------------------------------------------
+# POOL OF REUSABLE CONNECTIONS
+# ---------------------------------------------
+class ConnectionPool:
+
+    def __init__(self, backend, size):
+        self.backend = backend
+        self.size = size
+        self.created = 0
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+
+    @contextmanager
+    def connection(self):
+        # Connections are opened lazily up to `size`, then callers wait for a free one
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                opening = self.created < self.size
+                if opening:
+                    self.created += 1
+            if opening:
+                try:
+                    conn = self.backend.connect()
+                except Exception:
+                    # A failed connect must not use up a slot, or callers end up waiting forever
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            else:
+                conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+            self.created -= 1
+
+
+# ---------------------------------------------
+# BASE BACKEND (DB-API EXECUTEMANY)
+# ---------------------------------------------
+class Backend:
+
+    name = "generic"
+    supports_merge = False
+
+    def __init__(self):
+        self.pool = None
+
+    def connect(self):
+        raise NotImplementedError
+
+    @contextmanager
+    def connection(self):
+        # One pool per backend, shared by everything in the process
+        if self.pool is None:
+            self.pool = ConnectionPool(self, Config.DB_POOL_SIZE)
+        with self.pool.connection() as conn:
+            yield conn
+
+    def read_sql(self, query, conn):
+        import pandas as pd
+        return pd.read_sql(query, conn)
+
+    @staticmethod
+    def python_rows(frame):
+        # Plain Python values (None for NaN) so DB-API drivers can bind them
+        values = frame.astype(object).where(frame.notna(), None)
+        return values.itertuples(index=False, name=None)
+
+    def bulk_insert(self, cursor, table, columns, frame, batch_size):
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({','.join('?' * len(columns))})"
+        rows = self.python_rows(frame)
+
+        round_trips = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            round_trips += 1
+        return round_trips
+
+
+# ---------------------------------------------
+# SQL SERVER (PYODBC, FAST_EXECUTEMANY)
+# ---------------------------------------------
+class SQLServerBackend(Backend):
+
+    name = "SQL Server"
+    supports_merge = True
+
+    def __init__(self, conn_string=Config.SQLSERVER_CONN_STRING):
+        super().__init__()
+        self.conn_string = conn_string
+
+    def connect(self):
+        import pyodbc
+        return pyodbc.connect(self.conn_string)
+
+    def bulk_insert(self, cursor, table, columns, frame, batch_size):
+        # Parameter arrays: one round-trip per batch instead of per row
+        cursor.fast_executemany = Config.FAST_EXECUTEMANY
+        return super().bulk_insert(cursor, table, columns, frame, batch_size)
+
+
+def local_path(path):
+    # Relative DB files live next to Config.py, whatever directory the ETL or ML script runs from
+    return os.path.join(os.path.dirname(os.path.abspath(Config.__file__)), path)
+
+
+# ---------------------------------------------
+# SQLITE (LOCAL FILE ATTACHED AS "telco")
+# ---------------------------------------------
+class SQLiteBackend(Backend):
+
+    name = "SQLite"
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path   # None: Config.SQLITE_PATH, read when connecting
+
+    def connect(self):
+        # Pooled connections may be handed to worker threads
+        conn = sqlite3.connect(":memory:", timeout=60, check_same_thread=False)
+        conn.execute("ATTACH DATABASE ? AS telco", (local_path(self.path or Config.SQLITE_PATH),))
+        with open(os.path.join(HERE, "telco_schema_sqlite.sql")) as f:
+            conn.executescript(f.read())
+        return conn
+
+
+# ---------------------------------------------
+# DUCKDB (DATAFRAME SCAN INSTEAD OF BOUND ROWS)
+# ---------------------------------------------
+class DuckDBBackend(Backend):
+
+    name = "DuckDB"
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path   # None: Config.DUCKDB_PATH, read when connecting
+        self.database = None
+
+    def connect(self):
+        import duckdb
+
+        # DuckDB allows one writer per file, so pooled connections are cursors on it
+        if self.database is None:
+            path = local_path(self.path or Config.DUCKDB_PATH)
+            # The catalog is named after the file stem; "telco" would be ambiguous with the telco schema
+            if os.path.splitext(os.path.basename(path))[0].lower() == "telco":
+                raise ValueError(f"DuckDB file {path} would clash with the telco schema; use another name")
+            self.database = duckdb.connect(path)
+            with open(os.path.join(HERE, "telco_schema_duckdb.sql")) as f:
+                self.database.execute(f.read())
+        return self.database.cursor()
+
+    def read_sql(self, query, conn):
+        return conn.execute(query).df()
+
+    def bulk_insert(self, cursor, table, columns, frame, batch_size):
+        # The whole frame is scanned in place; batch_size does not apply
+        batch = frame.copy()
+        batch.columns = columns
+        cursor.register("bulk_batch", batch)
+        try:
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM bulk_batch")
+        finally:
+            cursor.unregister("bulk_batch")
+        return 1
+
+
+# ---------------------------------------------
+# BACKEND FROM CONFIG
+# ---------------------------------------------
+BACKENDS = {
+    "sqlserver": SQLServerBackend,
+    "sqlite": SQLiteBackend,
+    "duckdb": DuckDBBackend,
+}
+
+_default = {}
+
+
+def get_backend(name=None):
+    # Same instance (and so the same pool) for every caller in the process
+    name = name or Config.DB_BACKEND
+    if name not in _default:
+        _default[name] = BACKENDS[name]()
+    return _default[name]
@@ -0,0 +1,163 @@
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import Config
+from CleaningSchema import INTERNET_ADDON, PHONE_ADDON, TELCO_SCHEMA, quarantine
+
+INTERNET_ADDON_COLUMNS = [
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies"
+]
+NO_PHONE, NO_INTERNET = PHONE_ADDON[1], INTERNET_ADDON[1]
+
+# Every column a fact row needs to resolve both surrogate keys
+FACT_KEY_COLUMNS = [
+    "customerID", "PhoneService", "MultipleLines", "InternetService",
+    *INTERNET_ADDON_COLUMNS, "MonthlyCharges"
+]
+
+
+# ---------------------------------------------
+# RULES (EACH RETURNS A WHOLE-FRAME FAILURE MASK)
+# ---------------------------------------------
+def out_of_domain(df):
+    bad = np.zeros(len(df), dtype=bool)
+    for name, spec in TELCO_SCHEMA.items():
+        if spec["type"] == "category":
+            bad |= ~df[name].isin(spec["domain"]).to_numpy()
+    return bad
+
+
+def phone_lines_mismatch(df):
+    # "No phone service" exactly when PhoneService is 0
+    return ((df["PhoneService"] == 0) != (df["MultipleLines"] == NO_PHONE)).to_numpy()
+
+
+def internet_addons_mismatch(df):
+    # Every add-on says "No internet service" exactly when InternetService is "No"
+    no_internet = (df["InternetService"] == "No").to_numpy()
+    bad = np.zeros(len(df), dtype=bool)
+    for name in INTERNET_ADDON_COLUMNS:
+        bad |= no_internet != (df[name] == NO_INTERNET).to_numpy()
+    return bad
+
+
+def incomplete_fact_keys(df):
+    return df[FACT_KEY_COLUMNS].isna().any(axis=1).to_numpy() | (df["customerID"] == "").to_numpy()
+
+
+def charges_inconsistent(df, tolerance=Config.CHARGES_TOLERANCE):
+    # Prices change over a subscription, so allow a relative band plus one month of slack
+    monthly = df["MonthlyCharges"].to_numpy(dtype="float64")
+    total = df["TotalCharges"].to_numpy(dtype="float64")
+    expected = df["tenure"].to_numpy(dtype="float64") * monthly
+    return np.abs(total - expected) > tolerance * expected + monthly
+
+
+# name -> (severity, check). "error" rows are quarantined before any DB call;
+# "warn" rows are counted in the report but still loaded.
+VALIDATION_RULES = {
+    "customerID: incomplete fact keys": ("error", incomplete_fact_keys),
+    "domain: value outside schema": ("error", out_of_domain),
+    "domain: MultipleLines vs PhoneService": ("error", phone_lines_mismatch),
+    "domain: add-ons vs InternetService": ("error", internet_addons_mismatch),
+    "TotalCharges: not ~ tenure x MonthlyCharges": ("warn", charges_inconsistent),
+}
+
+
+# ---------------------------------------------
+# VALIDATOR (STATE CARRIES ACROSS CHUNKS / FILES)
+# ---------------------------------------------
+class DataValidator:
+
+    def __init__(self, rules=VALIDATION_RULES, max_reject_pct=Config.VALIDATION_MAX_REJECT_PCT,
+                 run_id=None, written=None):
+        self.rules = rules
+        self.max_reject_pct = max_reject_pct
+        # Rejects go to a file per run, so a second run never overwrites or extends the first one's
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.written = set() if written is None else written
+        self.seen_ids = pd.Index([], dtype=object)   # customerIDs passed in earlier chunks
+        self.rows = 0
+        self.rejected = 0
+        self.counts = {"customerID: duplicate": 0, **{name: 0 for name in rules}}
+        self.examples = {name: [] for name in self.counts}
+
+    def duplicate_ids(self, df):
+        # Within a frame the last row wins (as in merge mode); across streamed
+        # chunks the earlier row is already loaded, so the later one is rejected
+        ids = df["customerID"]
+        return (ids.duplicated(keep="last") | ids.isin(self.seen_ids)).to_numpy()
+
+    def validate(self, df, source=None):
+        failures = {"customerID: duplicate": ("error", self.duplicate_ids(df))}
+        failures.update({name: (severity, check(df)) for name, (severity, check) in self.rules.items()})
+
+        bad = np.zeros(len(df), dtype=bool)
+        for name, (severity, mask) in failures.items():
+            if mask.any():
+                self.counts[name] += int(mask.sum())
+                self.examples[name] += df.index[mask][:5 - len(self.examples[name])].tolist()
+            if severity == "error":
+                bad |= mask
+
+        self.rows += len(df)
+        self.rejected += int(bad.sum())
+
+        if bad.any():
+            rejected = df[bad].copy()
+            reasons = pd.Series("", index=rejected.index)
+            for name, (severity, mask) in failures.items():
+                hit = mask[bad]
+                if severity == "error" and hit.any():
+                    reasons[hit] = reasons[hit].where(reasons[hit] == "", reasons[hit] + "; ") + name
+            rejected["reject_reason"] = reasons
+            # Own file, apart from the cleaning rejects (which may come from other processes)
+            stem = os.path.splitext(os.path.basename(source or "extract"))[0]
+            quarantine(rejected, f"{stem}.invalid.csv", self.run_id, self.written)
+            df = df[~bad]
+
+        self.seen_ids = self.seen_ids.append(pd.Index(df["customerID"].to_numpy()))
+
+        # Far too many bad rows means a broken extract: stop before touching the DB
+        if self.rejected * 100 > self.max_reject_pct * self.rows:
+            raise ValueError(
+                f"{self.rejected} of {self.rows} rows ({100 * self.rejected / self.rows:.1f}%) failed validation, "
+                f"above the {self.max_reject_pct}% limit: {self.summary()}"
+            )
+        return df
+
+    # ---------------------------------------------
+    # SUMMARY REPORT
+    # ---------------------------------------------
+    def summary(self):
+        return {name: count for name, count in self.counts.items() if count}
+
+    def report(self, source=None, directory=Config.QUARANTINE_DIR):
+        severities = {"customerID: duplicate": "error", **{n: s for n, (s, _) in self.rules.items()}}
+        report = {
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "rules": [
+                {"rule": name, "severity": severities[name], "failures": count,
+                 "pct": round(100 * count / self.rows, 3) if self.rows else 0.0,
+                 "example_rows": [int(i) for i in self.examples[name]]}
+                for name, count in self.counts.items()
+            ],
+        }
+
+        print(f"Validation: {self.rows} rows checked, {self.rejected} quarantined")
+        for rule in report["rules"]:
+            if rule["failures"]:
+                print(f"  [{rule['severity']}] {rule['rule']}: {rule['failures']} ({rule['pct']}%) "
+                      f"e.g. rows {rule['example_rows']}")
+
+        os.makedirs(directory, exist_ok=True)
+        name = os.path.splitext(os.path.basename(source or "extract"))[0]
+        path = os.path.join(directory, f"{name}.validation.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        return report
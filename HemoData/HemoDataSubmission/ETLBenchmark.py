@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from DataValidation import DataValidator
+from DBBackend import DuckDBBackend, SQLiteBackend
+from ETLMetrics import ETLMetrics
+from HemoDataTest_ETL import TelcoETL
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(HERE, "bench_history.jsonl")
+
+
+# ------------------------------------------------------
+# SYNTHETIC TELCO-SCHEMA CSV
+# ------------------------------------------------------
+def id_uniform(ids, salt):
+    # splitmix64 of (id, salt): every attribute is a pure function of the
+    # customer id, so a repeated customer repeats its whole row
+    x = ids.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(salt)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def pick(ids, salt, choices):
+    choices = np.asarray(choices)
+    return choices[(id_uniform(ids, salt) * len(choices)).astype(int)]
+
+
+def generate_telco_csv(path, rows, duplicate_rate=0.01, seed=42, chunk_rows=500000):
+    # Written in chunks so 10M-row files never sit in memory at once
+    rng = np.random.default_rng(seed)
+    yes_no = ["Yes", "No"]
+
+    first = True
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+
+        ids = np.arange(start, start + n)
+        # A share of rows repeat an earlier customer, like the 7590-VHVEG reruns
+        dup = (rng.random(n) < duplicate_rate) & (ids > 0)
+        ids[dup] = rng.integers(0, ids[dup])
+        ids = ids + seed * 1_000_000_000
+
+        internet = pick(ids, 1, ["DSL", "Fiber optic", "No"])
+        phone = pick(ids, 2, yes_no)
+        tenure = (id_uniform(ids, 3) * 73).astype(int)
+        monthly = np.round(18.25 + id_uniform(ids, 4) * 100.5, 2)
+
+        df = pd.DataFrame({
+            "customerID": [f"{i % 10_000_000_000:010d}-SYN" for i in ids],
+            "gender": pick(ids, 5, ["Male", "Female"]),
+            "SeniorCitizen": (id_uniform(ids, 6) < 0.16).astype(int),
+            "Partner": pick(ids, 7, yes_no),
+            "Dependents": pick(ids, 8, yes_no),
+            "tenure": tenure,
+            "PhoneService": phone,
+            "MultipleLines": np.where(phone == "No", "No phone service", pick(ids, 9, yes_no)),
+            "InternetService": internet,
+        })
+        for salt, c in enumerate(["OnlineSecurity", "OnlineBackup", "DeviceProtection",
+                                  "TechSupport", "StreamingTV", "StreamingMovies"], start=10):
+            df[c] = np.where(internet == "No", "No internet service", pick(ids, salt, yes_no))
+
+        df["Contract"] = pick(ids, 20, ["Month-to-month", "One year", "Two year"])
+        df["PaperlessBilling"] = pick(ids, 21, yes_no)
+        df["PaymentMethod"] = pick(ids, 22, [
+            "Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"
+        ])
+        df["MonthlyCharges"] = monthly
+        # New customers have a blank TotalCharges, as in the real extract
+        df["TotalCharges"] = np.where(tenure == 0, " ", np.round(monthly * tenure, 2).astype(str))
+        df["Churn"] = np.where(id_uniform(ids, 23) < 0.265, "Yes", "No")
+
+        df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        first = False
+
+    return path
+
+
+# Local engines the benchmark can run against, with their file extension
+LOCAL_BACKENDS = {
+    "sqlite": (SQLiteBackend, "db"),
+    "duckdb": (DuckDBBackend, "duckdb"),
+}
+
+
+# ------------------------------------------------------
+# RUN ONE SIZE / MODE
+# ------------------------------------------------------
+def run_case(csv_path, rows, mode, backend_name, batch_size, chunk_size, workdir):
+    backend_class, extension = LOCAL_BACKENDS[backend_name]
+    db_path = os.path.join(workdir, f"telco_{rows}_{mode}.{extension}")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    # Untraced: tracemalloc would dominate the timings; memory is the case's peak RSS below
+    metrics = ETLMetrics(path=None, prometheus_path=None, trace_memory=False,
+                         labels={"rows": rows, "mode": mode, "backend": backend_name})
+    etl = TelcoETL(csv_path, backend_class(db_path), batch_size=batch_size, chunk_size=chunk_size, metrics=metrics)
+    # Repeated customers are generated on purpose: validation still runs (and is timed)
+    # but --duplicate-rate above the production reject limit must not abort the case
+    etl.validator = DataValidator(max_reject_pct=100.0, run_id=metrics.run_id, written=etl.quarantined)
+
+    start = time.perf_counter()
+    if mode == "stream":
+        etl.run_streaming()
+    else:
+        etl.run()
+    total = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "mode": mode,
+        "backend": backend_name,
+        "total_seconds": round(total, 3),
+        "rows_per_second": round(rows / total, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        "trace_memory": False,
+        "stages": {r["stage"]: r for r in metrics.records()},
+    }
+
+
+def run_case_isolated(*args):
+    # ru_maxrss is a process-lifetime peak: a fresh (spawned, not forked) process
+    # per case keeps one case's peak from showing up in the next one's
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_case, *args).result()
+
+
+# ------------------------------------------------------
+# HISTORY ACROSS COMMITS
+# ------------------------------------------------------
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def previous_result(commit, rows, mode, backend_name):
+    if not os.path.exists(HISTORY_PATH):
+        return None
+
+    previous = None
+    with open(HISTORY_PATH) as f:
+        for line in f:
+            entry = json.loads(line)
+            # Older entries were timed with tracemalloc on, so they are not comparable
+            if (entry["commit"] != commit and entry["rows"] == rows and entry["mode"] == mode
+                    and entry.get("backend", "sqlite") == backend_name and entry.get("trace_memory") is False):
+                previous = entry
+    return previous
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+# ------------------------------------------------------
+# MAIN EXECUTION
+# ------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TelcoETL end to end on synthetic data and a local database.")
+    parser.add_argument("--sizes", default="10k,1m", help="comma-separated row counts, e.g. 10k,1m,10m")
+    parser.add_argument("--modes", default="batch,stream", help="batch (TelcoETL.run) and/or stream (run_streaming)")
+    parser.add_argument("--backend", choices=sorted(LOCAL_BACKENDS), default="sqlite")
+    parser.add_argument("--duplicate-rate", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "telco_etl_bench"))
+    parser.add_argument("--no-history", action="store_true", help="do not append results to bench_history.jsonl")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    commit = current_commit()
+
+    print(f"{'Rows':>10} | {'Mode':<6} | {'Seconds':>8} | {'Rows/s':>10} | {'vs last commit':>14} | {'Max RSS MB':>10}")
+    print("-" * 75)
+
+    for rows in [parse_size(s) for s in args.sizes.split(",")]:
+        # Generated files are reused between runs with the same parameters
+        csv_path = os.path.join(args.workdir, f"telco_{rows}_{args.duplicate_rate}.csv")
+        if not os.path.exists(csv_path):
+            generate_telco_csv(csv_path, rows, args.duplicate_rate)
+
+        for mode in args.modes.split(","):
+            result = run_case_isolated(csv_path, rows, mode, args.backend, args.batch_size, args.chunk_size, args.workdir)
+
+            previous = previous_result(commit, rows, mode, args.backend)
+            change = ""
+            if previous:
+                delta = result["rows_per_second"] / previous["rows_per_second"] - 1
+                change = f"{delta:+.1%} ({previous['commit']})"
+
+            print(f"{rows:>10} | {mode:<6} | {result['total_seconds']:>8.2f} | "
+                  f"{result['rows_per_second']:>10.0f} | {change:>14} | {result['max_rss_mb'] or '-':>10}")
+            for name, stage in result["stages"].items():
+                print(f"{'':>10}   {name:<24} {stage['wall_seconds']:>8.2f}s  "
+                      f"{stage['rows_per_second'] or 0:>10.0f} rows/s")
+
+            if not args.no_history:
+                with open(HISTORY_PATH, "a") as f:
+                    f.write(json.dumps({
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                        "commit": commit,
+                        "duplicate_rate": args.duplicate_rate,
+                        **result,
+                    }) + "\n")
@@ -0,0 +1,155 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import Config
+
+# Several loaders (e.g. parallel partitions) may append to the same file
+_write_lock = threading.Lock()
+
+
+# ---------------------------------------------
+# DECORATOR: TIME A LOADER METHOD AS A STAGE
+# ---------------------------------------------
+def timed_stage(name):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------
+# PER-STAGE METRICS FOR ONE ETL RUN
+# ---------------------------------------------
+class ETLMetrics:
+
+    def __init__(self, run_id=None, path=Config.METRICS_PATH,
+                 prometheus_path=Config.PROMETHEUS_TEXTFILE, labels=None, trace_memory=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.path = path
+        self.prometheus_path = prometheus_path
+        self.labels = labels or {}
+        self.trace_memory = Config.METRICS_TRACE_MEMORY if trace_memory is None else trace_memory
+        self.stages = {}
+        self.active = []
+
+    # ---------------------------------------------
+    # TIME A STAGE (REPEATED STAGES ACCUMULATE)
+    # ---------------------------------------------
+    @contextmanager
+    def stage(self, name):
+        totals = self.stages.setdefault(name, {
+            "seconds": 0.0, "rows": 0, "round_trips": 0, "commits": 0, "peak_mem_mb": None, "calls": 0
+        })
+
+        # Memory is only traced for the outermost stage, nested stages share it.
+        # Tracing stops again when that stage ends, so untimed code runs at full speed.
+        trace = self.trace_memory and not self.active
+        started = False
+        if trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started = True
+            tracemalloc.reset_peak()
+
+        self.active.append(totals)
+        start = time.perf_counter()
+        try:
+            yield totals
+        finally:
+            totals["seconds"] += time.perf_counter() - start
+            totals["calls"] += 1
+            self.active.pop()
+
+            if trace and tracemalloc.is_tracing():
+                peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                totals["peak_mem_mb"] = max(totals["peak_mem_mb"] or 0.0, peak)
+            if started:
+                tracemalloc.stop()
+
+    # ---------------------------------------------
+    # COUNTERS (CHARGED TO THE INNERMOST ACTIVE STAGE)
+    # ---------------------------------------------
+    def add_rows(self, n):
+        if self.active:
+            self.active[-1]["rows"] += n
+
+    def add_round_trip(self, n=1):
+        if self.active:
+            self.active[-1]["round_trips"] += n
+
+    def add_commit(self):
+        if self.active:
+            self.active[-1]["commits"] += 1
+
+    # ---------------------------------------------
+    # EMIT JSON LINES (AND OPTIONAL PROMETHEUS FILE)
+    # ---------------------------------------------
+    def records(self):
+        for name, totals in self.stages.items():
+            seconds = totals["seconds"]
+            yield {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "run_id": self.run_id,
+                **self.labels,
+                "stage": name,
+                "wall_seconds": round(seconds, 4),
+                "rows": totals["rows"],
+                "rows_per_second": round(totals["rows"] / seconds, 1) if seconds > 0 else None,
+                "round_trips": totals["round_trips"],
+                "commits": totals["commits"],
+                "peak_mem_mb": round(totals["peak_mem_mb"], 2) if totals["peak_mem_mb"] is not None else None,
+                "calls": totals["calls"],
+            }
+
+    def emit(self):
+        records = list(self.records())
+
+        with _write_lock:
+            if self.path:
+                with open(self.path, "a") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+
+            if self.prometheus_path:
+                self.write_prometheus(records)
+
+        return records
+
+    def write_prometheus(self, records):
+        # node_exporter textfile format; the whole file is replaced each run
+        metrics = {
+            "wall_seconds": "Wall-clock seconds spent in the stage",
+            "rows": "Rows processed by the stage",
+            "rows_per_second": "Stage throughput in rows per second",
+            "round_trips": "Database round-trips issued by the stage",
+            "commits": "Database commits issued by the stage",
+            "peak_mem_mb": "Peak traced Python memory during the stage (MB)",
+        }
+
+        lines = []
+        for metric, help_text in metrics.items():
+            lines.append(f"# HELP telco_etl_{metric} {help_text}")
+            lines.append(f"# TYPE telco_etl_{metric} gauge")
+            for record in records:
+                if record[metric] is None:
+                    continue
+                labels = {"stage": record["stage"], **{k: str(v) for k, v in self.labels.items()}}
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"telco_etl_{metric}{{{label_str}}} {record[metric]}")
+
+        tmp_path = self.prometheus_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        # Atomic swap so the exporter never reads a half-written file
+        os.replace(tmp_path, self.prometheus_path)
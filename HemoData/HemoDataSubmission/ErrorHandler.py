@@ -1,4 +1,9 @@
+import atexit
+import hashlib
 import logging
+import queue
+import threading
+import time
 import traceback
 import smtplib
 from email.mime.text import MIMEText
@@ -24,23 +29,179 @@ SMTP_PORT = Config.SMTP_PORT
 
 
 # ---------------------------------------------
-# SEND EMAIL (CALLED BY handle_error)
+# SEND EMAIL (ONE-OFF, SYNCHRONOUS)
 # ---------------------------------------------
+def build_message(subject, body):
+    msg = MIMEText(body)
+    msg["Subject"] = subject
+    msg["From"] = SENDER_EMAIL
+    msg["To"] = RECIPIENT_EMAIL
+    return msg
+
+
 def send_error_email(subject, body):
     try:
-        msg = MIMEText(body)
-        msg["Subject"] = subject
-        msg["From"] = SENDER_EMAIL
-        msg["To"] = RECIPIENT_EMAIL
-
         with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT) as server:
             server.login(SENDER_EMAIL, SENDER_PASSWORD)
-            server.send_message(msg)
+            server.send_message(build_message(subject, body))
 
     except Exception as e:
         logging.error("Failed to send error email: " + str(e))
 
 
+# ---------------------------------------------
+# BACKGROUND ALERT DISPATCHER (USED BY handle_error)
+# ---------------------------------------------
+class AlertDispatcher:
+
+    _stop = object()
+
+    def __init__(self, server=SMTP_SERVER, port=SMTP_PORT, use_ssl=Config.ALERT_SMTP_SSL,
+                 password=SENDER_PASSWORD, dedup_seconds=Config.ALERT_DEDUP_SECONDS,
+                 max_per_minute=Config.ALERT_MAX_PER_MINUTE, idle_seconds=Config.ALERT_SMTP_IDLE_SECONDS):
+        self.server = server
+        self.port = port
+        self.use_ssl = use_ssl
+        self.password = password
+        self.dedup_seconds = dedup_seconds
+        self.max_per_minute = max_per_minute
+        self.idle_seconds = idle_seconds
+
+        self.queue = queue.Queue()
+        self.pending = {}      # traceback hash -> coalesced alert waiting to go out
+        self.last_sent = {}    # traceback hash -> when it was last emailed
+        self.tokens = float(max_per_minute)
+        self.refilled = time.monotonic()
+        self.smtp = None
+        self.smtp_used = 0.0
+        self.sent = 0
+        self.worker = None
+        self.lock = threading.Lock()
+
+    # ---------------------------------------------
+    # CALLER SIDE: NEVER BLOCKS ON THE NETWORK
+    # ---------------------------------------------
+    def submit(self, subject, body):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name="alert-dispatcher", daemon=True)
+                self.worker.start()
+        self.queue.put((subject, body, time.time()))
+
+    def close(self, timeout=10):
+        # Flushes whatever is still pending (one digest) before the process exits
+        if self.worker is not None and self.worker.is_alive():
+            self.queue.put(self._stop)
+            self.worker.join(timeout)
+
+    # ---------------------------------------------
+    # WORKER THREAD
+    # ---------------------------------------------
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+
+            if item is self._stop:
+                self.flush_all()
+                self.disconnect()
+                return
+            if item is not None:
+                self.coalesce(*item)
+
+            self.dispatch_ready()
+
+            if self.smtp and time.monotonic() - self.smtp_used > self.idle_seconds:
+                self.disconnect()
+
+    def coalesce(self, subject, body, seen_at):
+        key = hashlib.sha1(body.encode()).hexdigest()
+        alert = self.pending.setdefault(key, {"subject": subject, "body": body, "count": 0, "first": seen_at})
+        alert["count"] += 1
+        alert["last"] = seen_at
+
+    def take_token(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_per_minute, self.tokens + (now - self.refilled) * self.max_per_minute / 60)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def dispatch_ready(self):
+        now = time.monotonic()
+        for key, alert in list(self.pending.items()):
+            # Repeats of an alert sent recently wait out the window and go as one summary
+            if key in self.last_sent and now - self.last_sent[key] < self.dedup_seconds:
+                continue
+            if not self.take_token():
+                break
+            self.send(alert["subject"], self.describe(alert))
+            self.last_sent[key] = now
+            del self.pending[key]
+
+    def flush_all(self):
+        if not self.pending:
+            return
+        alerts = list(self.pending.values())
+        self.pending.clear()
+        if len(alerts) == 1:
+            self.send(alerts[0]["subject"], self.describe(alerts[0]))
+        else:
+            digest = "\n\n" + "-" * 60 + "\n\n"
+            self.send(f"{alerts[0]['subject']} ({len(alerts)} distinct errors)",
+                      digest.join(self.describe(a) for a in alerts))
+
+    @staticmethod
+    def describe(alert):
+        if alert["count"] == 1:
+            return alert["body"]
+        first = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(alert["first"]))
+        last = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(alert["last"]))
+        return f"Occurred {alert['count']} times between {first} and {last}.\n\n{alert['body']}"
+
+    # ---------------------------------------------
+    # PERSISTENT SMTP CONNECTION
+    # ---------------------------------------------
+    def connect(self):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        self.smtp = smtp_class(self.server, self.port, timeout=30)
+        if self.password:
+            self.smtp.login(SENDER_EMAIL, self.password)
+
+    def disconnect(self):
+        if self.smtp:
+            try:
+                self.smtp.quit()
+            except Exception:
+                pass
+            self.smtp = None
+
+    def send(self, subject, body):
+        msg = build_message(subject, body)
+        # One reconnect: the server may have dropped the idle session
+        for attempt in range(2):
+            try:
+                if self.smtp is None:
+                    self.connect()
+                self.smtp.send_message(msg)
+                self.smtp_used = time.monotonic()
+                self.sent += 1
+                return
+            except Exception as e:
+                self.disconnect()
+                if attempt == 1 or isinstance(e, smtplib.SMTPAuthenticationError):
+                    logging.error("Failed to send error email: " + str(e))
+                    return
+
+
+alerts = AlertDispatcher()
+atexit.register(alerts.close)
+
+
 # ---------------------------------------------
 # MAIN ERROR HANDLER (CALLED FROM ETL)
 # ---------------------------------------------
@@ -48,6 +209,7 @@ def handle_error(message, exception_obj):
     full_error = f"{message}\n\n{traceback.format_exc()}"
     
     logging.error(full_error)
-    send_error_email("ETL Failure", full_error)
+    # Queued: the email goes out from the dispatcher thread, not the failing ETL
+    alerts.submit("ETL Failure", full_error)
     
     raise exception_obj
@@ -1,77 +1,423 @@
+import argparse
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-import pyodbc
 import Config
+from Aggregates import refresh_aggregates
+from CleaningSchema import CSV_DTYPES, TELCO_SCHEMA, clean, quarantine
+from DataValidation import DataValidator
+from DBBackend import BACKENDS, SQLServerBackend, get_backend
 from ErrorHandler import handle_error
+from ETLMetrics import ETLMetrics, timed_stage
+
+# CSV columns that together identify a dim_service row
+SERVICE_KEY_COLUMNS = [
+    "PhoneService", "MultipleLines", "InternetService",
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies",
+    "MonthlyCharges"
+]
+
+# Target column lists of the telco tables
+CUSTOMER_COLUMNS = ["customerID", "gender", "senior_citizen", "partner", "dependents"]
+SERVICE_COLUMNS = [
+    "phone_service", "multiple_lines", "internet_service",
+    "online_security", "online_backup", "device_protection",
+    "tech_support", "streaming_tv", "streaming_movies",
+    "monthly_charges"
+]
+FACT_COLUMNS = [
+    "customer_dim_id", "service_dim_id",
+    "tenure", "contract", "paperless_billing",
+    "payment_method", "total_charges", "churn"
+]
+
+# Run / batch watermarks for resumable loads (SQLite and DuckDB declare them in their schema files)
+CHECKPOINT_DDL_SQLSERVER = """
+    IF OBJECT_ID('telco.etl_run', 'U') IS NULL
+    CREATE TABLE telco.etl_run (
+        run_id      VARCHAR(32) PRIMARY KEY,
+        source      VARCHAR(400),
+        mode        VARCHAR(10),
+        status      VARCHAR(20),
+        started_at  DATETIME2,
+        finished_at DATETIME2 NULL
+    );
+    IF OBJECT_ID('telco.etl_batch', 'U') IS NULL
+    CREATE TABLE telco.etl_batch (
+        run_id       VARCHAR(32),
+        batch_no     INT,
+        first_row    BIGINT,
+        last_row     BIGINT,
+        row_count    INT,
+        committed_at DATETIME2,
+        PRIMARY KEY (run_id, batch_no)
+    );
+"""
+
+
+# ------------------------------------------------------
+# NORMALIZED SERVICE KEY (SAME HASH FOR CSV AND DB ROWS)
+# ------------------------------------------------------
+def service_key_hash(keys):
+    keys = keys.copy()
+    keys.columns = SERVICE_KEY_COLUMNS
+
+    # Charges as integer cents, so 29.85 from the CSV matches DECIMAL(10,2) 29.85
+    keys["MonthlyCharges"] = (keys["MonthlyCharges"].astype("float64") * 100).round().astype("int64")
+    keys["PhoneService"] = keys["PhoneService"].astype("int8")
+    for c in SERVICE_KEY_COLUMNS[1:-1]:
+        keys[c] = keys[c].astype(str).astype("category")
+
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
 
 
 class TelcoETL:
 
-    def __init__(self, csv_path, conn_string):
+    def __init__(self, csv_path, backend=None, bulk=True, batch_size=Config.BATCH_SIZE, mode="insert",
+                 chunk_size=Config.CHUNK_SIZE, metrics=None, checkpoint_size=Config.CHECKPOINT_SIZE, resume=False,
+                 aggregates=True, validate=True):
         self.csv_path = csv_path
-        self.conn_string = conn_string
+        self.backend = backend or get_backend()
+        self.bulk = bulk
+        self.batch_size = batch_size
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.merge_stats = {}
+        self.stage_suffix = ""
         self.conn = None
         self.cursor = None
         self.df = None
-        self.customer_lookup = {}
-        self.service_lookup = {}
+        self.customer_lookup = pd.Series(dtype="int64")   # customerID -> customer_dim_id
+        self.service_lookup = pd.Series(dtype="int64")    # service key hash -> service_dim_id
+        self.customer_max_id = 0
+        self.service_max_id = 0
+        self.metrics = metrics or ETLMetrics()
+        self.checkpoint_size = checkpoint_size
+        self.resume = resume
+        self.run_id = None        # set by start_run; fact loads are checkpointed only within a run
+        self.resume_from = 0      # first CSV row whose fact is not committed yet
+        self.batch_no = 0
+        self.aggregates = aggregates
+        self.quarantined = set()  # quarantine files this run has started
+        self.validator = DataValidator(run_id=self.metrics.run_id, written=self.quarantined) if validate else None
 
     # ------------------------------------------------
-    # CONNECT TO SQL SERVER
+    # CONNECT TO THE CONFIGURED BACKEND
     # ------------------------------------------------
+    @timed_stage("connect")
     def connect(self):
         try:
-            self.conn = pyodbc.connect(self.conn_string)
+            if self.mode == "merge" and not self.backend.supports_merge:
+                raise ValueError(f"Merge mode is not available on {self.backend.name}")
+
+            self.conn = self.backend.connect()
             self.cursor = self.conn.cursor()
         except Exception as e:
-            handle_error("Failed to connect to SQL Server", e)
+            handle_error(f"Failed to connect to {self.backend.name}", e)
+
+    # ------------------------------------------------
+    # DB CALLS (COUNTED FOR THE STAGE METRICS)
+    # ------------------------------------------------
+    def execute(self, sql, *params):
+        self.metrics.add_round_trip()
+        # One parameter sequence: the form pyodbc, sqlite3 and duckdb all accept
+        return self.cursor.execute(sql, params) if params else self.cursor.execute(sql)
+
+    def commit(self):
+        self.metrics.add_commit()
+        self.conn.commit()
+
+    # ------------------------------------------------
+    # RUN / BATCH WATERMARKS (RESUMABLE LOADS)
+    # ------------------------------------------------
+    def start_run(self):
+        try:
+            if isinstance(self.backend, SQLServerBackend):
+                self.execute(CHECKPOINT_DDL_SQLSERVER)
+
+            # Dimensions already in the DB are skipped, so a rerun does not hit duplicate keys
+            self.refresh_customer_lookup()
+            self.refresh_service_lookup()
+
+            if not self.checkpoint_size:
+                return
+
+            if self.resume:
+                self.execute("""
+                    SELECT run_id, started_at FROM telco.etl_run
+                    WHERE source = ? AND mode = ? AND status <> 'completed'
+                """, self.csv_path, self.mode)
+                unfinished = [tuple(row) for row in self.cursor.fetchall()]
+
+                if unfinished:
+                    self.run_id = max(unfinished, key=lambda row: row[1])[0]
+                    self.execute("""
+                        SELECT COALESCE(MAX(last_row), -1), COALESCE(MAX(batch_no), 0)
+                        FROM telco.etl_batch WHERE run_id = ?
+                    """, self.run_id)
+                    last_row, self.batch_no = self.cursor.fetchone()
+                    self.resume_from = int(last_row) + 1
+                    print(f"Resuming run {self.run_id} from CSV row {self.resume_from} (batch {self.batch_no + 1}).")
+                    return
+
+                print("No unfinished run to resume; starting a new one.")
+
+            self.run_id = self.metrics.run_id
+            self.execute("""
+                INSERT INTO telco.etl_run (run_id, source, mode, status, started_at)
+                VALUES (?, ?, ?, 'running', ?)
+            """, self.run_id, self.csv_path, self.mode, datetime.now())
+            self.commit()
+
+        except Exception as e:
+            handle_error("Failed starting the ETL run", e)
+
+    def record_batch(self, batch):
+        # Same transaction as the batch's rows: the watermark never runs ahead of the data
+        self.batch_no += 1
+        self.execute("""
+            INSERT INTO telco.etl_batch (run_id, batch_no, first_row, last_row, row_count, committed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, self.run_id, self.batch_no, int(batch.index[0]), int(batch.index[-1]), len(batch), datetime.now())
+
+    def finish_run(self):
+        if not self.run_id:
+            return
+        try:
+            self.execute("""
+                UPDATE telco.etl_run SET status = 'completed', finished_at = ? WHERE run_id = ?
+            """, datetime.now(), self.run_id)
+            self.commit()
+        except Exception as e:
+            handle_error("Failed closing the ETL run", e)
+
+    # ------------------------------------------------
+    # INSERT ROWS (BATCHED OR ROW BY ROW)
+    # ------------------------------------------------
+    def insert_rows(self, table, columns, frame):
+        self.metrics.add_rows(len(frame))
+
+        if not self.bulk:
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({','.join('?' * len(columns))})"
+            for row in self.backend.python_rows(frame):
+                self.execute(sql, *row)
+            return
+
+        # Dialect-specific bulk path (fast_executemany, DataFrame scan, ...)
+        round_trips = self.backend.bulk_insert(self.cursor, table, columns, frame, self.batch_size)
+        self.metrics.add_round_trip(round_trips)
+
+    # ------------------------------------------------
+    # STAGE ROWS AND MERGE INTO TARGET
+    # ------------------------------------------------
+    def merge_rows(self, table, columns, stage_columns, frame, merge_sql):
+        # Parallel loaders each get their own staging table via stage_suffix
+        stage = f"telco.stg_{table}{self.stage_suffix}"
+
+        self.execute(f"IF OBJECT_ID('{stage}', 'U') IS NULL CREATE TABLE {stage} ({stage_columns})")
+        self.execute(f"TRUNCATE TABLE {stage}")
+
+        self.insert_rows(stage, columns, frame)
+
+        # MERGE logs each action it takes; unchanged rows produce no action
+        self.execute(f"""
+            SET NOCOUNT ON;
+            DECLARE @actions TABLE (merge_action NVARCHAR(10));
+            {merge_sql.format(stage=stage)}
+            OUTPUT $action INTO @actions;
+            SELECT
+                SUM(CASE WHEN merge_action = 'INSERT' THEN 1 ELSE 0 END),
+                SUM(CASE WHEN merge_action = 'UPDATE' THEN 1 ELSE 0 END)
+            FROM @actions;
+        """)
+        inserted, updated = self.cursor.fetchone()
+        inserted, updated = inserted or 0, updated or 0
+
+        # Accumulated, since streaming runs merge once per chunk
+        stats = self.merge_stats.setdefault(table, {"inserted": 0, "updated": 0, "unchanged": 0})
+        stats["inserted"] += inserted
+        stats["updated"] += updated
+        stats["unchanged"] += len(frame) - inserted - updated
 
     # ------------------------------------------------
     # LOAD AND CLEAN CSV
     # ------------------------------------------------
+    @staticmethod
+    def clean_frame(df, source, run_id, written):
+        # Schema-driven: categoricals, int8 flags and float32 charges in one pass;
+        # rows that break the schema are quarantined instead of zero-filled
+        df, rejected = clean(df, TELCO_SCHEMA)
+        quarantine(rejected, source, run_id, written)
+        return df
+
+    @timed_stage("load_and_clean")
     def load_and_clean(self):
         try:
-            df = pd.read_csv(self.csv_path)
+            self.df = self.clean_frame(pd.read_csv(self.csv_path, dtype=CSV_DTYPES), self.csv_path,
+                                       self.metrics.run_id, self.quarantined)
+            self.metrics.add_rows(len(self.df))
+
+        except Exception as e:
+            handle_error("Failed during CSV load and clean", e)
 
-            # Strip whitespace
-            df = df.apply(lambda col: col.str.strip() if col.dtype == 'object' else col)
+    # ------------------------------------------------
+    # VALIDATE BEFORE ANY ROW REACHES THE DATABASE
+    # ------------------------------------------------
+    def validate_frame(self, df, source=None):
+        if self.validator is None:
+            return df
+        try:
+            with self.metrics.stage("validate"):
+                self.metrics.add_rows(len(df))
+                return self.validator.validate(df, source or self.csv_path)
+        except Exception as e:
+            handle_error("Failed data validation", e)
 
-            # Convert Yes/No → 1/0
-            yes_no_cols = ["Partner", "Dependents", "PhoneService", "PaperlessBilling", "Churn"]
-            for c in yes_no_cols:
-                df[c] = df[c].map({"Yes": 1, "No": 0}).fillna(0).astype(int)
+    def iter_valid_chunks(self, chunks):
+        for chunk in chunks:
+            yield self.validate_frame(chunk)
 
-            # Numeric conversions
-            df["MonthlyCharges"] = pd.to_numeric(df["MonthlyCharges"], errors="coerce").fillna(0)
-            df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0)
+    def report_validation(self, source=None):
+        if self.validator is not None:
+            self.validator.report(source or self.csv_path)
 
-            self.df = df
+    # ------------------------------------------------
+    # STREAM CLEANED CSV CHUNKS
+    # ------------------------------------------------
+    def iter_chunks(self):
+        try:
+            reader = pd.read_csv(self.csv_path, dtype=CSV_DTYPES, chunksize=self.chunk_size)
+            while True:
+                # Timed per chunk; the consumer's work between chunks is not counted
+                with self.metrics.stage("load_and_clean"):
+                    chunk = next(reader, None)
+                    if chunk is None:
+                        break
+                    chunk = self.clean_frame(chunk, self.csv_path, self.metrics.run_id, self.quarantined)
+                    self.metrics.add_rows(len(chunk))
+                yield chunk
 
         except Exception as e:
             handle_error("Failed during CSV load and clean", e)
 
+    # ------------------------------------------------
+    # REFRESH LOOKUPS (ONLY ROWS ADDED SINCE LAST CALL)
+    # ------------------------------------------------
+    def refresh_customer_lookup(self):
+        self.execute("""
+            SELECT customer_dim_id, customerID FROM telco.dim_customer
+            WHERE customer_dim_id > ?
+        """, self.customer_max_id)
+
+        new = pd.DataFrame.from_records(
+            [tuple(row) for row in self.cursor.fetchall()],
+            columns=["customer_dim_id", "customerID"]
+        )
+        if new.empty:
+            return
+
+        added = pd.Series(new["customer_dim_id"].to_numpy(), index=new["customerID"])
+        # Concatenating onto the empty initial lookup warns on pandas 2.x
+        self.customer_lookup = pd.concat([self.customer_lookup, added]) if len(self.customer_lookup) else added
+        self.customer_max_id = int(new["customer_dim_id"].max())
+
+    def refresh_service_lookup(self):
+        self.execute("""
+            SELECT service_dim_id,
+                   phone_service, multiple_lines, internet_service,
+                   online_security, online_backup, device_protection,
+                   tech_support, streaming_tv, streaming_movies,
+                   monthly_charges
+            FROM telco.dim_service
+            WHERE service_dim_id > ?
+        """, self.service_max_id)
+
+        new = pd.DataFrame.from_records(
+            [tuple(row) for row in self.cursor.fetchall()],
+            columns=["service_dim_id"] + SERVICE_KEY_COLUMNS
+        )
+        if new.empty:
+            return
+
+        added = pd.Series(new["service_dim_id"].to_numpy(), index=service_key_hash(new[SERVICE_KEY_COLUMNS]))
+        self.service_lookup = pd.concat([self.service_lookup, added]) if len(self.service_lookup) else added
+        # Older loads may hold repeated combinations; the first id wins
+        self.service_lookup = self.service_lookup[~self.service_lookup.index.duplicated()]
+        self.service_max_id = int(new["service_dim_id"].max())
+
+    # ------------------------------------------------
+    # RESOLVE SURROGATE KEYS (WHOLE FRAME AT ONCE)
+    # ------------------------------------------------
+    @timed_stage("resolve_keys")
+    def resolve_keys(self, df):
+        self.metrics.add_rows(len(df))
+        customer_ids = self.customer_lookup.reindex(df["customerID"]).to_numpy()
+        service_ids = self.service_lookup.reindex(service_key_hash(df[SERVICE_KEY_COLUMNS])).to_numpy()
+
+        missing_customer = np.isnan(customer_ids)
+        missing_service = np.isnan(service_ids)
+
+        if missing_customer.any() or missing_service.any():
+            raise KeyError(
+                f"{int(missing_customer.sum())} rows with unknown customerID "
+                f"(e.g. {df.loc[missing_customer, 'customerID'].head(5).tolist()}), "
+                f"{int(missing_service.sum())} rows with unknown service combination "
+                f"(e.g. rows {df.index[missing_service][:5].tolist()})"
+            )
+
+        fact = df[[
+            "tenure", "Contract", "PaperlessBilling",
+            "PaymentMethod", "TotalCharges", "Churn"
+        ]].copy()
+        fact.insert(0, "service_dim_id", service_ids.astype("int64"))
+        fact.insert(0, "customer_dim_id", customer_ids.astype("int64"))
+
+        return fact
+
     # ------------------------------------------------
     # LOAD DIM CUSTOMER
     # ------------------------------------------------
-    def load_dim_customer(self):
+    @timed_stage("load_dim_customer")
+    def load_dim_customer(self, df=None):
         try:
-            dim_customer = self.df[[
+            df = self.df if df is None else df
+            dim_customer = df[[
                 "customerID", "gender", "SeniorCitizen", "Partner", "Dependents"
             ]].drop_duplicates()
 
-            for _, row in dim_customer.iterrows():
-                self.cursor.execute("""
-                    INSERT INTO telco.dim_customer (
-                        customerID, gender, senior_citizen, partner, dependents
-                    ) VALUES (?,?,?,?,?)
-                """,
-                row["customerID"], row["gender"], row["SeniorCitizen"],
-                row["Partner"], row["Dependents"])
-
-            self.conn.commit()
-
-            # Build lookup
-            self.cursor.execute("SELECT customer_dim_id, customerID FROM telco.dim_customer")
-            self.customer_lookup = {row.customerID: row.customer_dim_id for row in self.cursor.fetchall()}
+            if self.mode == "merge":
+                # One source row per business key, otherwise MERGE refuses to run
+                dim_customer = dim_customer.drop_duplicates(subset="customerID", keep="last")
+
+                self.merge_rows("dim_customer", CUSTOMER_COLUMNS, """
+                    customerID VARCHAR(50), gender VARCHAR(20),
+                    senior_citizen BIT, partner BIT, dependents BIT
+                """, dim_customer, """
+                    MERGE telco.dim_customer AS t
+                    USING {stage} AS s
+                        ON t.customerID = s.customerID
+                    WHEN MATCHED AND EXISTS (
+                        SELECT s.gender, s.senior_citizen, s.partner, s.dependents
+                        EXCEPT
+                        SELECT t.gender, t.senior_citizen, t.partner, t.dependents
+                    ) THEN UPDATE SET
+                        gender = s.gender, senior_citizen = s.senior_citizen,
+                        partner = s.partner, dependents = s.dependents
+                    WHEN NOT MATCHED BY TARGET THEN
+                        INSERT (customerID, gender, senior_citizen, partner, dependents)
+                        VALUES (s.customerID, s.gender, s.senior_citizen, s.partner, s.dependents)
+                """)
+            else:
+                # Customers already loaded by an earlier chunk are not inserted again
+                dim_customer = dim_customer[~dim_customer["customerID"].isin(self.customer_lookup.index)]
+
+                self.insert_rows("telco.dim_customer", CUSTOMER_COLUMNS, dim_customer)
+
+            self.commit()
+
+            self.refresh_customer_lookup()
 
         except Exception as e:
             handle_error("Failed loading dim_customer", e)
@@ -79,50 +425,54 @@ class TelcoETL:
     # ------------------------------------------------
     # LOAD DIM SERVICE
     # ------------------------------------------------
-    def load_dim_service(self):
+    @timed_stage("load_dim_service")
+    def load_dim_service(self, df=None):
         try:
-            dim_service = self.df[[
-                "PhoneService", "MultipleLines", "InternetService",
-                "OnlineSecurity", "OnlineBackup", "DeviceProtection",
-                "TechSupport", "StreamingTV", "StreamingMovies",
-                "MonthlyCharges"
-            ]].drop_duplicates()
-
-            for _, row in dim_service.iterrows():
-                self.cursor.execute("""
-                    INSERT INTO telco.dim_service (
-                        phone_service, multiple_lines, internet_service,
-                        online_security, online_backup, device_protection,
-                        tech_support, streaming_tv, streaming_movies,
-                        monthly_charges
-                    ) VALUES (?,?,?,?,?,?,?,?,?,?)
-                """,
-                row["PhoneService"], row["MultipleLines"], row["InternetService"],
-                row["OnlineSecurity"], row["OnlineBackup"], row["DeviceProtection"],
-                row["TechSupport"], row["StreamingTV"], row["StreamingMovies"],
-                row["MonthlyCharges"])
-
-            self.conn.commit()
-
-            # Build lookup
-            self.cursor.execute("""
-                SELECT service_dim_id,
-                       phone_service, multiple_lines, internet_service,
-                       online_security, online_backup, device_protection,
-                       tech_support, streaming_tv, streaming_movies,
-                       monthly_charges
-                FROM telco.dim_service
-            """)
-
-            for row in self.cursor.fetchall():
-                key = (
-                    row.phone_service, row.multiple_lines, row.internet_service,
-                    row.online_security, row.online_backup, row.device_protection,
-                    row.tech_support, row.streaming_tv, row.streaming_movies,
-                    float(row.monthly_charges)
-                )
-
-                self.service_lookup[key] = row.service_dim_id
+            df = self.df if df is None else df
+            dim_service = df[SERVICE_KEY_COLUMNS].drop_duplicates()
+
+            if self.mode == "merge":
+                # Every attribute is part of the key, so existing combinations are left alone
+                self.merge_rows("dim_service", SERVICE_COLUMNS, """
+                    phone_service BIT, multiple_lines VARCHAR(50), internet_service VARCHAR(50),
+                    online_security VARCHAR(50), online_backup VARCHAR(50), device_protection VARCHAR(50),
+                    tech_support VARCHAR(50), streaming_tv VARCHAR(50), streaming_movies VARCHAR(50),
+                    monthly_charges DECIMAL(10, 2)
+                """, dim_service, """
+                    MERGE telco.dim_service AS t
+                    USING (SELECT DISTINCT * FROM {stage}) AS s
+                        ON  t.phone_service = s.phone_service
+                        AND t.multiple_lines = s.multiple_lines
+                        AND t.internet_service = s.internet_service
+                        AND t.online_security = s.online_security
+                        AND t.online_backup = s.online_backup
+                        AND t.device_protection = s.device_protection
+                        AND t.tech_support = s.tech_support
+                        AND t.streaming_tv = s.streaming_tv
+                        AND t.streaming_movies = s.streaming_movies
+                        AND t.monthly_charges = s.monthly_charges
+                    WHEN NOT MATCHED BY TARGET THEN
+                        INSERT (
+                            phone_service, multiple_lines, internet_service,
+                            online_security, online_backup, device_protection,
+                            tech_support, streaming_tv, streaming_movies,
+                            monthly_charges
+                        ) VALUES (
+                            s.phone_service, s.multiple_lines, s.internet_service,
+                            s.online_security, s.online_backup, s.device_protection,
+                            s.tech_support, s.streaming_tv, s.streaming_movies,
+                            s.monthly_charges
+                        )
+                """)
+            else:
+                # Service combinations already in the dimension are not inserted again
+                dim_service = dim_service[~np.isin(service_key_hash(dim_service), self.service_lookup.index)]
+
+                self.insert_rows("telco.dim_service", SERVICE_COLUMNS, dim_service)
+
+            self.commit()
+
+            self.refresh_service_lookup()
 
         except Exception as e:
             handle_error("Failed loading dim_service", e)
@@ -130,36 +480,87 @@ class TelcoETL:
     # ------------------------------------------------
     # LOAD FACT SUBSCRIPTION
     # ------------------------------------------------
-    def load_fact_subscription(self):
+    def load_fact_subscription(self, df=None):
         try:
-            for _, row in self.df.iterrows():
+            df = self.df if df is None else df
+            fact = self.resolve_keys(df)
 
-                customer_dim_id = self.customer_lookup[row["customerID"]]
+        except Exception as e:
+            handle_error("Failed resolving fact_subscription keys", e)
 
-                service_key = (
-                    row["PhoneService"], row["MultipleLines"], row["InternetService"],
-                    row["OnlineSecurity"], row["OnlineBackup"], row["DeviceProtection"],
-                    row["TechSupport"], row["StreamingTV"], row["StreamingMovies"],
-                    float(row["MonthlyCharges"])
-                )
+        self.load_fact_rows(fact)
 
-                service_dim_id = self.service_lookup[service_key]
+    @timed_stage("load_fact_subscription")
+    def load_fact_rows(self, fact):
+        try:
+            if self.run_id:
+                # Fact index = CSV row number, so committed rows are skipped on resume
+                fact = fact[fact.index >= self.resume_from]
+                for start in range(0, len(fact), self.checkpoint_size):
+                    batch = fact.iloc[start:start + self.checkpoint_size]
+                    self.write_fact_rows(batch)
+                    self.record_batch(batch)
+                    self.commit()
+            else:
+                self.write_fact_rows(fact)
+                self.commit()
+
+        except Exception as e:
+            handle_error("Failed loading fact_subscription", e)
 
-                self.cursor.execute("""
-                    INSERT INTO telco.fact_subscription (
+    def write_fact_rows(self, fact):
+        if self.mode == "merge":
+            # One subscription per customer: the latest row in the extract wins
+            fact = fact.drop_duplicates(subset="customer_dim_id", keep="last")
+
+            self.merge_rows("fact_subscription", FACT_COLUMNS, """
+                customer_dim_id INT, service_dim_id INT,
+                tenure INT, contract VARCHAR(50), paperless_billing BIT,
+                payment_method VARCHAR(100), total_charges DECIMAL(12, 2), churn BIT
+            """, fact, """
+                MERGE telco.fact_subscription AS t
+                USING {stage} AS s
+                    ON t.customer_dim_id = s.customer_dim_id
+                WHEN MATCHED AND EXISTS (
+                    SELECT s.service_dim_id, s.tenure, s.contract, s.paperless_billing,
+                           s.payment_method, s.total_charges, s.churn
+                    EXCEPT
+                    SELECT t.service_dim_id, t.tenure, t.contract, t.paperless_billing,
+                           t.payment_method, t.total_charges, t.churn
+                ) THEN UPDATE SET
+                    service_dim_id = s.service_dim_id, tenure = s.tenure,
+                    contract = s.contract, paperless_billing = s.paperless_billing,
+                    payment_method = s.payment_method, total_charges = s.total_charges,
+                    churn = s.churn
+                WHEN NOT MATCHED BY TARGET THEN
+                    INSERT (
                         customer_dim_id, service_dim_id,
                         tenure, contract, paperless_billing,
                         payment_method, total_charges, churn
-                    ) VALUES (?,?,?,?,?,?,?,?)
-                """,
-                customer_dim_id, service_dim_id,
-                row["tenure"], row["Contract"], row["PaperlessBilling"],
-                row["PaymentMethod"], row["TotalCharges"], row["Churn"])
-
-            self.conn.commit()
+                    ) VALUES (
+                        s.customer_dim_id, s.service_dim_id,
+                        s.tenure, s.contract, s.paperless_billing,
+                        s.payment_method, s.total_charges, s.churn
+                    )
+            """)
+        else:
+            self.insert_rows("telco.fact_subscription", FACT_COLUMNS, fact)
 
+    # ------------------------------------------------
+    # POST-LOAD: DASHBOARD AGGREGATES + FACT INDEXES
+    # ------------------------------------------------
+    @timed_stage("aggregates")
+    def build_aggregates(self):
+        if not self.aggregates:
+            return
+        try:
+            # MERGE may have changed facts in place, which the fact_id watermark cannot see.
+            # The refresh runs on its own cursor, so it charges its rows to this stage itself
+            action, facts = refresh_aggregates(self.backend, self.conn, full=self.mode == "merge",
+                                               metrics=self.metrics)
+            print(f"Churn aggregates {action} ({facts} facts).")
         except Exception as e:
-            handle_error("Failed loading fact_subscription", e)
+            handle_error("Failed refreshing churn aggregates", e)
 
     # ------------------------------------------------
     # RUN ALL STEPS
@@ -167,31 +568,88 @@ class TelcoETL:
     def run(self):
         try:
             self.connect()
+            self.start_run()
             self.load_and_clean()
+            self.df = self.validate_frame(self.df)
+            self.report_validation()
             self.load_dim_customer()
             self.load_dim_service()
             self.load_fact_subscription()
+            self.build_aggregates()
+            self.finish_run()
 
         finally:
             if self.cursor:
                 self.cursor.close()
             if self.conn:
                 self.conn.close()
+            self.metrics.emit()
+
+    # ------------------------------------------------
+    # RUN ALL STEPS, ONE CSV CHUNK AT A TIME
+    # ------------------------------------------------
+    def iter_loaded_chunks(self, chunks):
+        # Dimensions first, so every key in the chunk resolves when its facts load
+        for chunk in chunks:
+            self.load_dim_customer(chunk)
+            self.load_dim_service(chunk)
+            yield chunk
+
+    def run_streaming(self):
+        try:
+            self.connect()
+            self.start_run()
+
+            # Only the current chunk and the key lookups are held in memory
+            for chunk in self.iter_loaded_chunks(self.iter_valid_chunks(self.iter_chunks())):
+                self.load_fact_subscription(chunk)
+
+            self.report_validation()
+            self.build_aggregates()
+            self.finish_run()
+
+        finally:
+            if self.cursor:
+                self.cursor.close()
+            if self.conn:
+                self.conn.close()
+            self.metrics.emit()
 
 
 # ------------------------------------------------------
 # MAIN EXECUTION
 # ------------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the Telco churn CSV into the telco star schema.")
+    parser.add_argument("--mode", choices=["insert", "merge"], default="insert",
+                        help="insert: blind full load; merge: incremental upsert of changed rows")
+    parser.add_argument("--batch-size", type=int, default=Config.BATCH_SIZE)
+    parser.add_argument("--stream", action="store_true",
+                        help="read, clean and load the CSV chunk by chunk with bounded memory")
+    parser.add_argument("--chunk-size", type=int, default=Config.CHUNK_SIZE)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=Config.DB_BACKEND)
+    parser.add_argument("--checkpoint-size", type=int, default=Config.CHECKPOINT_SIZE,
+                        help="fact rows committed per checkpointed batch (0 = one commit per stage)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the last unfinished run of this CSV after its last committed batch")
+    parser.add_argument("--skip-aggregates", action="store_true",
+                        help="do not refresh the dashboard aggregate tables after the load")
+    parser.add_argument("--skip-validation", action="store_true",
+                        help="load cleaned rows without the pre-load data-quality checks")
+    args = parser.parse_args()
+
     CSV_PATH = Config.path
-    CONN_STRING = (
-        r"Driver={ODBC Driver 17 for SQL Server};"
-        r"Server=MSI\SQLEXPRESS;"
-        r"Database=HemoData_Telco_DB;"
-        r"Trusted_Connection=yes;"
-    )
-
-    etl = TelcoETL(CSV_PATH, CONN_STRING)
-    etl.run()
+
+    etl = TelcoETL(CSV_PATH, get_backend(args.backend), bulk=True, batch_size=args.batch_size, mode=args.mode,
+                   chunk_size=args.chunk_size, checkpoint_size=args.checkpoint_size, resume=args.resume,
+                   aggregates=not args.skip_aggregates, validate=not args.skip_validation)
+
+    if args.stream:
+        etl.run_streaming()
+    else:
+        etl.run()
+
+    for table, stats in etl.merge_stats.items():
+        print(f"{table}: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged")
 
     print("ETL completed successfully.")
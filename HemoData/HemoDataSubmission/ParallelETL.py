@@ -0,0 +1,186 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import Config
+from CleaningSchema import CSV_DTYPES
+from DBBackend import BACKENDS, ConnectionPool, get_backend
+from ErrorHandler import handle_error
+from ETLMetrics import ETLMetrics
+from HemoDataTest_ETL import TelcoETL, SERVICE_KEY_COLUMNS
+
+
+# ------------------------------------------------------
+# PROCESS POOL WORKERS (MODULE LEVEL SO THEY PICKLE)
+# ------------------------------------------------------
+def clean_file(path, run_id):
+    # Each file is cleaned whole by one worker, so its quarantine file starts fresh here
+    return TelcoETL.clean_frame(pd.read_csv(path, dtype=CSV_DTYPES), path, run_id, set())
+
+
+_resolver = None
+
+
+def init_resolver(customer_lookup, service_lookup):
+    # Lookups are shipped once per worker process, not once per file
+    global _resolver
+    _resolver = TelcoETL(None, None)
+    _resolver.customer_lookup = customer_lookup
+    _resolver.service_lookup = service_lookup
+
+
+def resolve_file(df):
+    return _resolver.resolve_keys(df)
+
+
+# ------------------------------------------------------
+# PARALLEL DRIVER
+# ------------------------------------------------------
+class ParallelTelcoETL:
+
+    def __init__(self, source, backend=None, mode="insert", workers=Config.PARALLEL_WORKERS,
+                 db_connections=Config.DB_POOL_SIZE, batch_size=Config.BATCH_SIZE, aggregates=True, validate=True):
+        self.paths = self.find_files(source)
+        self.backend = backend or get_backend()
+        self.mode = mode
+        self.workers = workers
+        self.db_connections = db_connections
+        self.batch_size = batch_size
+        self.coordinator = TelcoETL(None, self.backend, batch_size=batch_size, mode=mode,
+                                    aggregates=aggregates, validate=validate)
+
+    @staticmethod
+    def find_files(source):
+        pattern = os.path.join(source, "*.csv") if os.path.isdir(source) else source
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            raise FileNotFoundError(f"No CSV files match {source}")
+        return paths
+
+    # ------------------------------------------------
+    # DIMENSIONS: ONE WRITER FOR ALL FILES
+    # ------------------------------------------------
+    def load_dimensions(self, frames):
+        # Workers never touch the dimensions, so dim_customer / dim_service
+        # uniqueness cannot be raced; the coordinator loads the union once
+        dims = pd.concat(
+            [df[["customerID", "gender", "SeniorCitizen", "Partner", "Dependents"] + SERVICE_KEY_COLUMNS]
+             for df in frames],
+            ignore_index=True
+        )
+        self.coordinator.load_dim_customer(dims)
+        self.coordinator.load_dim_service(dims)
+
+    # ------------------------------------------------
+    # FACTS: ONE FILE PER POOLED CONNECTION
+    # ------------------------------------------------
+    def load_partition(self, pool, index, fact):
+        with pool.connection() as conn:
+            # Each partition reports under the coordinator's run id
+            metrics = ETLMetrics(run_id=self.coordinator.metrics.run_id, prometheus_path=None,
+                                 labels={"partition": self.paths[index]})
+            loader = TelcoETL(None, self.backend, batch_size=self.batch_size, mode=self.mode, metrics=metrics)
+            loader.conn = conn
+            loader.cursor = conn.cursor()
+            loader.stage_suffix = f"_p{index}"
+            try:
+                loader.load_fact_rows(fact)
+            finally:
+                loader.cursor.close()
+                metrics.emit()
+            return loader.merge_stats
+
+    def run(self):
+        pool = None
+        try:
+            self.coordinator.connect()
+
+            # Dimensions already in the DB are skipped, so a rerun does not hit duplicate keys
+            try:
+                self.coordinator.refresh_customer_lookup()
+                self.coordinator.refresh_service_lookup()
+            except Exception as e:
+                handle_error("Failed reading existing dimension keys", e)
+
+            try:
+                with self.coordinator.metrics.stage("load_and_clean"), \
+                        ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    run_ids = [self.coordinator.metrics.run_id] * len(self.paths)
+                    frames = list(executor.map(clean_file, self.paths, run_ids))
+                    self.coordinator.metrics.add_rows(sum(len(df) for df in frames))
+            except Exception as e:
+                handle_error("Failed during parallel CSV load and clean", e)
+
+            # One validator across files, so a customerID repeated in two extracts is caught
+            frames = [self.coordinator.validate_frame(df, path) for df, path in zip(frames, self.paths)]
+            self.coordinator.report_validation("parallel_load")
+
+            self.load_dimensions(frames)
+
+            try:
+                with self.coordinator.metrics.stage("resolve_keys"), ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=init_resolver,
+                    initargs=(self.coordinator.customer_lookup, self.coordinator.service_lookup)
+                ) as executor:
+                    facts = list(executor.map(resolve_file, frames))
+                    self.coordinator.metrics.add_rows(sum(len(df) for df in facts))
+            except Exception as e:
+                handle_error("Failed resolving fact_subscription keys", e)
+
+            # Fact loads report their own failures through handle_error
+            # At most db_connections fact loads hit the database at once
+            pool = ConnectionPool(self.backend, self.db_connections)
+            with ThreadPoolExecutor(max_workers=self.db_connections) as executor:
+                results = list(executor.map(self.load_partition, [pool] * len(facts), range(len(facts)), facts))
+
+            # Per-partition merge counts roll up into the coordinator's totals
+            for stats in results:
+                for table, counts in stats.items():
+                    total = self.coordinator.merge_stats.setdefault(table, {"inserted": 0, "updated": 0, "unchanged": 0})
+                    for k, v in counts.items():
+                        total[k] += v
+
+            # Once, after every partition has committed
+            self.coordinator.build_aggregates()
+
+        finally:
+            if pool:
+                pool.close()
+            if self.coordinator.cursor:
+                self.coordinator.cursor.close()
+            if self.coordinator.conn:
+                self.coordinator.conn.close()
+            self.coordinator.metrics.emit()
+
+
+# ------------------------------------------------------
+# MAIN EXECUTION
+# ------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a directory or glob of regional Telco extracts in parallel.")
+    parser.add_argument("source", help="directory of CSV files, or a glob such as 'extracts/*_2025-12-01.csv'")
+    parser.add_argument("--mode", choices=["insert", "merge"], default="insert")
+    parser.add_argument("--workers", type=int, default=Config.PARALLEL_WORKERS,
+                        help="processes used to clean and key-resolve files")
+    parser.add_argument("--db-connections", type=int, default=Config.DB_POOL_SIZE,
+                        help="concurrent fact loads (size of the connection pool)")
+    parser.add_argument("--batch-size", type=int, default=Config.BATCH_SIZE)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=Config.DB_BACKEND)
+    parser.add_argument("--skip-aggregates", action="store_true",
+                        help="do not refresh the dashboard aggregate tables after the load")
+    parser.add_argument("--skip-validation", action="store_true",
+                        help="load cleaned rows without the pre-load data-quality checks")
+    args = parser.parse_args()
+
+    etl = ParallelTelcoETL(args.source, get_backend(args.backend), mode=args.mode, workers=args.workers,
+                           db_connections=args.db_connections, batch_size=args.batch_size,
+                           aggregates=not args.skip_aggregates, validate=not args.skip_validation)
+    etl.run()
+
+    for table, stats in etl.coordinator.merge_stats.items():
+        print(f"{table}: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged")
+
+    print(f"ETL completed successfully for {len(etl.paths)} files.")
@@ -0,0 +1,92 @@
+-- Local DuckDB stand-in for the telco star schema in "HemoData_Arun_DB Script.sql".
+-- IDENTITY columns become sequences; BIT becomes BOOLEAN (DuckDB's BIT is a bitstring).
+
+CREATE SCHEMA IF NOT EXISTS telco;
+
+CREATE SEQUENCE IF NOT EXISTS telco.seq_customer_dim_id;
+CREATE SEQUENCE IF NOT EXISTS telco.seq_service_dim_id;
+CREATE SEQUENCE IF NOT EXISTS telco.seq_fact_id;
+
+CREATE TABLE IF NOT EXISTS telco.dim_customer (
+    customer_dim_id INTEGER PRIMARY KEY DEFAULT nextval('telco.seq_customer_dim_id'),
+    customerID      VARCHAR(50) UNIQUE,
+    gender          VARCHAR(20),
+    senior_citizen  BOOLEAN,
+    partner         BOOLEAN,
+    dependents      BOOLEAN
+);
+
+CREATE TABLE IF NOT EXISTS telco.dim_service (
+    service_dim_id    INTEGER PRIMARY KEY DEFAULT nextval('telco.seq_service_dim_id'),
+    phone_service     BOOLEAN,
+    multiple_lines    VARCHAR(50),
+    internet_service  VARCHAR(50),
+    online_security   VARCHAR(50),
+    online_backup     VARCHAR(50),
+    device_protection VARCHAR(50),
+    tech_support      VARCHAR(50),
+    streaming_tv      VARCHAR(50),
+    streaming_movies  VARCHAR(50),
+    monthly_charges   DECIMAL(10, 2)
+);
+
+CREATE TABLE IF NOT EXISTS telco.fact_subscription (
+    fact_id           INTEGER PRIMARY KEY DEFAULT nextval('telco.seq_fact_id'),
+    customer_dim_id   INTEGER REFERENCES telco.dim_customer (customer_dim_id),
+    service_dim_id    INTEGER REFERENCES telco.dim_service (service_dim_id),
+    tenure            INTEGER,
+    contract          VARCHAR(50),
+    paperless_billing BOOLEAN,
+    payment_method    VARCHAR(100),
+    total_charges     DECIMAL(12, 2),
+    churn             BOOLEAN
+);
+
+-- Run / batch watermarks for checkpointed, resumable loads (HemoDataTest_ETL.py --resume)
+CREATE TABLE IF NOT EXISTS telco.etl_run (
+    run_id      VARCHAR(32) PRIMARY KEY,
+    source      VARCHAR(400),
+    mode        VARCHAR(10),
+    status      VARCHAR(20),
+    started_at  TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS telco.etl_batch (
+    run_id       VARCHAR(32),
+    batch_no     INTEGER,
+    first_row    BIGINT,
+    last_row     BIGINT,
+    row_count    INTEGER,
+    committed_at TIMESTAMP,
+    PRIMARY KEY (run_id, batch_no)
+);
+
+-- Written by the batch scorer (Telco_Churn_Prediction.py --batch)
+CREATE TABLE IF NOT EXISTS telco.churn_scores (
+    fact_id           INTEGER,
+    customerID        VARCHAR(50),
+    churn_prediction  BOOLEAN,
+    churn_probability DOUBLE,
+    model_name        VARCHAR(100),
+    scored_at         TIMESTAMP
+);
+
+-- Dashboard aggregates and their refresh watermark (Aggregates.py)
+CREATE TABLE IF NOT EXISTS telco.agg_churn_segment (
+    dimension       VARCHAR(30),
+    segment         VARCHAR(100),
+    customers       INTEGER,
+    churned         INTEGER,
+    churn_rate      DOUBLE,
+    monthly_revenue DECIMAL(14, 2),
+    revenue_at_risk DECIMAL(14, 2),
+    refreshed_at    TIMESTAMP,
+    PRIMARY KEY (dimension, segment)
+);
+
+CREATE TABLE IF NOT EXISTS telco.agg_refresh (
+    max_fact_id  INTEGER,
+    fact_count   INTEGER,
+    refreshed_at TIMESTAMP
+);
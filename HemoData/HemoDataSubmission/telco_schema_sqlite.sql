@@ -0,0 +1,88 @@
+-- Local stand-in for the telco star schema in "HemoData_Arun_DB Script.sql".
+-- The connection attaches a database as "telco" so the loaders' telco.<table>
+-- names resolve unchanged. Types keep the SQL Server names (SQLite maps them
+-- to INTEGER / TEXT / NUMERIC affinity).
+
+CREATE TABLE IF NOT EXISTS telco.dim_customer (
+    customer_dim_id INTEGER PRIMARY KEY,
+    customerID      VARCHAR(50) UNIQUE,
+    gender          VARCHAR(20),
+    senior_citizen  BIT,
+    partner         BIT,
+    dependents      BIT
+);
+
+CREATE TABLE IF NOT EXISTS telco.dim_service (
+    service_dim_id    INTEGER PRIMARY KEY,
+    phone_service     BIT,
+    multiple_lines    VARCHAR(50),
+    internet_service  VARCHAR(50),
+    online_security   VARCHAR(50),
+    online_backup     VARCHAR(50),
+    device_protection VARCHAR(50),
+    tech_support      VARCHAR(50),
+    streaming_tv      VARCHAR(50),
+    streaming_movies  VARCHAR(50),
+    monthly_charges   DECIMAL(10, 2)
+);
+
+CREATE TABLE IF NOT EXISTS telco.fact_subscription (
+    fact_id           INTEGER PRIMARY KEY,
+    customer_dim_id   INT REFERENCES dim_customer (customer_dim_id),
+    service_dim_id    INT REFERENCES dim_service (service_dim_id),
+    tenure            INT,
+    contract          VARCHAR(50),
+    paperless_billing BIT,
+    payment_method    VARCHAR(100),
+    total_charges     DECIMAL(12, 2),
+    churn             BIT
+);
+
+-- Run / batch watermarks for checkpointed, resumable loads (HemoDataTest_ETL.py --resume)
+CREATE TABLE IF NOT EXISTS telco.etl_run (
+    run_id      VARCHAR(32) PRIMARY KEY,
+    source      VARCHAR(400),
+    mode        VARCHAR(10),
+    status      VARCHAR(20),
+    started_at  DATETIME2,
+    finished_at DATETIME2
+);
+
+CREATE TABLE IF NOT EXISTS telco.etl_batch (
+    run_id       VARCHAR(32),
+    batch_no     INTEGER,
+    first_row    BIGINT,
+    last_row     BIGINT,
+    row_count    INTEGER,
+    committed_at DATETIME2,
+    PRIMARY KEY (run_id, batch_no)
+);
+
+-- Written by the batch scorer (Telco_Churn_Prediction.py --batch)
+CREATE TABLE IF NOT EXISTS telco.churn_scores (
+    fact_id           INT,
+    customerID        VARCHAR(50),
+    churn_prediction  BIT,
+    churn_probability FLOAT,
+    model_name        VARCHAR(100),
+    scored_at         DATETIME2
+);
+
+-- Dashboard aggregates and their refresh watermark (Aggregates.py)
+CREATE TABLE IF NOT EXISTS telco.agg_churn_segment (
+    dimension       VARCHAR(30),
+    segment         VARCHAR(100),
+    customers       INT,
+    churned         INT,
+    churn_rate      FLOAT,
+    monthly_revenue DECIMAL(14, 2),
+    revenue_at_risk DECIMAL(14, 2),
+    refreshed_at    DATETIME2,
+    PRIMARY KEY (dimension, segment)
+);
+
+CREATE TABLE IF NOT EXISTS telco.agg_refresh (
+    max_fact_id  INT,
+    fact_count   INT,
+    refreshed_at DATETIME2
+);
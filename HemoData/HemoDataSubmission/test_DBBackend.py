@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import Config
+from DBBackend import DuckDBBackend, SQLiteBackend
+
+
+# ---------------------------------------------
+# DEFAULT FILE NAMES OPEN AND CREATE THE SCHEMA
+# ---------------------------------------------
+@pytest.fixture
+def local_config(tmp_path, monkeypatch):
+    # Same file names as Config, inside a scratch directory (patched after import on purpose)
+    monkeypatch.setattr(Config, "SQLITE_PATH", str(tmp_path / os.path.basename(Config.SQLITE_PATH)))
+    monkeypatch.setattr(Config, "DUCKDB_PATH", str(tmp_path / os.path.basename(Config.DUCKDB_PATH)))
+    return tmp_path
+
+
+def test_sqlite_default_path(local_config):
+    conn = SQLiteBackend().connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM telco.dim_customer").fetchone() == (0,)
+    finally:
+        conn.close()
+    assert (local_config / os.path.basename(Config.SQLITE_PATH)).exists()
+
+
+def test_duckdb_default_path(local_config):
+    pytest.importorskip("duckdb")
+    backend = DuckDBBackend()
+    cursor = backend.connect()
+    try:
+        assert cursor.execute("SELECT COUNT(*) FROM telco.dim_customer").fetchone() == (0,)
+    finally:
+        cursor.close()
+        backend.database.close()
+    assert (local_config / os.path.basename(Config.DUCKDB_PATH)).exists()
+
+
+def test_duckdb_rejects_catalog_named_telco(tmp_path):
+    pytest.importorskip("duckdb")
+    with pytest.raises(ValueError, match="clash"):
+        DuckDBBackend(str(tmp_path / "telco.duckdb")).connect()
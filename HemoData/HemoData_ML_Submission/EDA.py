@@ -1,53 +1,47 @@
-import pandas as pd
-import pyodbc
-from ydata_profiling import ProfileReport
-
-# 1. CONNECT TO SQL (Single Source of Truth)
-conn_str = (
-    r"Driver={ODBC Driver 17 for SQL Server};"
-    r"Server=MSI\SQLEXPRESS;"
-    r"Database=HemoData_Telco_DB;"
-    r"Trusted_Connection=yes;"
-)
-
-query = """
-    SELECT 
-        -- From Fact Table (f)
-        f.churn, 
-        f.tenure, 
-        f.contract, 
-        f.total_charges, 
-        f.payment_method,   -- <--- This was the culprit! Now strictly pulling from Fact.
-        f.paperless_billing,
-
-        -- From Customer Dimension (c)
-        c.gender, 
-        c.senior_citizen, 
-        c.partner, 
-        c.dependents,
-
-        -- From Service Dimension (s)
-        s.internet_service, 
-        s.monthly_charges,
-        s.phone_service,
-        s.multiple_lines,
-        s.online_security,
-        s.tech_support
-    FROM telco.fact_subscription f
-    JOIN telco.dim_customer c ON f.customer_dim_id = c.customer_dim_id
-    JOIN telco.dim_service s  ON f.service_dim_id = s.service_dim_id
-"""
-
-# 2. LOAD DATA
-conn = pyodbc.connect(conn_str)
-df = pd.read_sql(query, conn)
-conn.close()
-
-# 3. GENERATE ENTERPRISE REPORT
-# 'explorative=True' enables deeper correlation checks and text analysis
-profile = ProfileReport(df, title="Telco Churn Data Profile", explorative=True)
-
-# 4. SAVE AS HTML
-profile.to_file("Telco_Data_Profile_Report.html")
-
-print("✅ Report generated! Open 'Telco_Data_Profile_Report.html' in your browser.")
\ No newline at end of file
+import argparse
+
+# 1. SINGLE SOURCE OF TRUTH (star join cached by Telco_Snapshot_Cache, backend chosen in HemoDataSubmission/Config.py)
+from Telco_Snapshot_Cache import load_snapshot
+
+EDA_COLUMNS = [
+    # From Fact Table (f)
+    "churn", "tenure", "contract", "total_charges",
+    "payment_method",   # <--- This was the culprit! Now strictly pulling from Fact.
+    "paperless_billing",
+
+    # From Customer Dimension (c)
+    "gender", "senior_citizen", "partner", "dependents",
+
+    # From Service Dimension (s)
+    "internet_service", "monthly_charges", "phone_service",
+    "multiple_lines", "online_security", "tech_support",
+]
+
+parser = argparse.ArgumentParser(description="Profile the Telco star join.")
+parser.add_argument("--fast", action="store_true",
+                    help="one streaming pass with sketches and a stratified sample instead of ydata-profiling")
+parser.add_argument("--sample-size", type=int, default=5000,
+                    help="rows per churn class kept for the correlations in --fast mode")
+parser.add_argument("--refresh", choices=["auto", "full", "never"], default="auto")
+args = parser.parse_args()
+
+if args.fast:
+    # 2. STREAMING PROFILE (sketches cached per snapshot part, so unchanged data is not re-read)
+    from Telco_Fast_Profile import fast_profile
+    report = "Telco_Data_Profile_Fast.html"
+    fast_profile(EDA_COLUMNS, report, "Telco Churn Data Profile (fast)", args.refresh, args.sample_size)
+else:
+    from ydata_profiling import ProfileReport
+
+    # 2. LOAD DATA (local Arrow snapshot of the star join, refreshed only when new facts arrive)
+    df = load_snapshot(refresh=args.refresh, columns=EDA_COLUMNS)
+
+    # 3. GENERATE ENTERPRISE REPORT
+    # 'explorative=True' enables deeper correlation checks and text analysis
+    profile = ProfileReport(df, title="Telco Churn Data Profile", explorative=True)
+
+    # 4. SAVE AS HTML
+    report = "Telco_Data_Profile_Report.html"
+    profile.to_file(report)
+
+print(f"✅ Report generated! Open '{report}' in your browser.")
\ No newline at end of file
@@ -1,14 +1,37 @@
-import pandas as pd
-import joblib
+import argparse
 import os
 import glob
 import sys
+import time
+from datetime import datetime
+
+# Shared DB backend layer and CSV cleaning live with the ETL
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "HemoDataSubmission"))
+import Config
+from DBBackend import DuckDBBackend, SQLServerBackend, get_backend
+from Telco_Model_Registry import get_entry, load_model
+
+# pandas and the model libraries are imported where they are used, so the
+# CLI and the scoring service pay only for what a given path needs
 
 # ==========================================
 # 1. AUTO-LOCATE MODEL
 # ==========================================
 def load_best_model():
-    # Find any file starting with "model_" and ending with ".pkl"
+    # Registry first: current version, memory-mapped arrays, no directory scan
+    entry = get_entry()
+    if entry:
+        print(f"Model found: {entry['name']} v{entry['version']} (registry)")
+        print(f"Loading model pipeline...")
+        try:
+            pipeline, entry = load_model(entry["version"])
+            return pipeline, entry["file"]
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            sys.exit()
+
+    # Fallback: loose model_*.pkl files saved before the registry existed
+    import joblib
     pkl_files = glob.glob("model_*.pkl")
     
     if not pkl_files:
@@ -33,6 +56,8 @@ def load_best_model():
 # 2. INPUT FORM
 # ==========================================
 def get_user_input():
+    import pandas as pd
+
     print("\n" + "="*50)
     print("ENTER NEW CUSTOMER DETAILS")
     print("="*50)
@@ -89,11 +114,177 @@ def get_user_input():
     return pd.DataFrame([data])
 
 # ==========================================
-# 3. PREDICTION ENGINE
+# 3. BATCH SCORING (WHOLE CUSTOMER BASE)
+# ==========================================
+SCORING_QUERY = """
+    SELECT
+        f.fact_id, c.customerID,
+        f.tenure, f.contract, f.paperless_billing, f.payment_method,
+        CAST(f.total_charges AS FLOAT) as total_charges,
+        c.gender, c.senior_citizen, c.partner, c.dependents,
+        s.phone_service, s.multiple_lines, s.internet_service,
+        s.online_security, s.online_backup, s.device_protection,
+        s.tech_support, s.streaming_tv, s.streaming_movies,
+        CAST(s.monthly_charges AS FLOAT) as monthly_charges
+    FROM telco.fact_subscription f
+    JOIN telco.dim_customer c ON f.customer_dim_id = c.customer_dim_id
+    JOIN telco.dim_service s  ON f.service_dim_id = s.service_dim_id
+"""
+
+# Raw extract headers -> model feature names
+CSV_COLUMNS = {
+    "customerID": "customerID", "gender": "gender", "SeniorCitizen": "senior_citizen",
+    "Partner": "partner", "Dependents": "dependents", "tenure": "tenure",
+    "PhoneService": "phone_service", "MultipleLines": "multiple_lines",
+    "InternetService": "internet_service", "OnlineSecurity": "online_security",
+    "OnlineBackup": "online_backup", "DeviceProtection": "device_protection",
+    "TechSupport": "tech_support", "StreamingTV": "streaming_tv",
+    "StreamingMovies": "streaming_movies", "Contract": "contract",
+    "PaperlessBilling": "paperless_billing", "PaymentMethod": "payment_method",
+    "MonthlyCharges": "monthly_charges", "TotalCharges": "total_charges",
+}
+
+SCORE_COLUMNS = ["fact_id", "customerID", "churn_prediction", "churn_probability", "model_name", "scored_at"]
+
+# SQLite / DuckDB get this table from their schema files
+SCORES_DDL_SQLSERVER = """
+    IF OBJECT_ID('telco.churn_scores') IS NULL
+    CREATE TABLE telco.churn_scores (
+        fact_id           INT NULL,
+        customerID        VARCHAR(50) NULL,
+        churn_prediction  BIT,
+        churn_probability FLOAT,
+        model_name        VARCHAR(100),
+        scored_at         DATETIME2
+    )
+"""
+
+
+def iter_db_chunks(backend, chunk_size):
+    # fact_id ranges page the same way on every backend (no TOP / LIMIT dialects)
+    with backend.connection() as conn:
+        max_id = int(backend.read_sql("SELECT COALESCE(MAX(fact_id), 0) FROM telco.fact_subscription", conn).iloc[0, 0])
+        for lo in range(1, max_id + 1, chunk_size):
+            chunk = backend.read_sql(f"{SCORING_QUERY} WHERE f.fact_id BETWEEN {lo} AND {lo + chunk_size - 1}", conn)
+            bool_cols = chunk.select_dtypes(include=['bool']).columns
+            chunk[bool_cols] = chunk[bool_cols].astype(int)
+            yield chunk
+
+
+def iter_csv_chunks(path, chunk_size):
+    # Imported here: interactive and service start-up never need the ETL module
+    from CleaningSchema import CSV_DTYPES
+    from HemoDataTest_ETL import TelcoETL
+    import pandas as pd
+
+    # Rows the cleaning schema rejects are quarantined under this scoring run
+    run_id, written = datetime.now().strftime("score-%Y%m%d-%H%M%S"), set()
+    for chunk in pd.read_csv(path, dtype=CSV_DTYPES, chunksize=chunk_size):
+        # clean_frame expects the label column; scoring extracts may not carry it
+        if "Churn" not in chunk:
+            chunk["Churn"] = "No"
+        chunk = TelcoETL.clean_frame(chunk, path, run_id, written)[list(CSV_COLUMNS)].rename(columns=CSV_COLUMNS)
+        chunk.insert(0, "fact_id", None)
+        yield chunk
+
+
+def score_frame(pipeline, df):
+    import pandas as pd
+
+    # One predict_proba pass gives both the probability and the label
+    if hasattr(pipeline, "predict_proba"):
+        proba = pipeline.predict_proba(df)
+        prediction = pipeline.classes_[proba.argmax(axis=1)]
+        probability = proba[:, list(pipeline.classes_).index(1)]
+    else:
+        prediction = pipeline.predict(df)
+        probability = float("nan")
+
+    return pd.DataFrame({
+        "fact_id": df["fact_id"].values,
+        "customerID": df["customerID"].values,
+        "churn_prediction": prediction.astype(int),
+        "churn_probability": probability,
+    })
+
+
+def batch_score(pipeline, model_name, source, output, chunk_size):
+    backend = get_backend()
+    chunks = iter_db_chunks(backend, chunk_size) if source == "db" else iter_csv_chunks(source, chunk_size)
+    to_table = output == "table"
+    # DB-API drivers (sqlite3 in particular) cannot bind a pandas Timestamp
+    scored_at = datetime.now()
+    if to_table:
+        scored_at = scored_at.isoformat(sep=" ", timespec="seconds")
+
+    writer = None
+    total = 0
+    start = time.perf_counter()
+
+    with backend.connection() as conn:
+        cursor = conn.cursor()
+        # A DuckDB cursor is its own autocommitting connection, so its transaction is opened on it
+        transaction = cursor if isinstance(backend, DuckDBBackend) else conn
+        try:
+            if to_table:
+                if transaction is cursor:
+                    cursor.begin()
+                if isinstance(backend, SQLServerBackend):
+                    cursor.execute(SCORES_DDL_SQLSERVER)
+                # Nightly run rescores the full base, so the previous scores are replaced.
+                # Delete and inserts share one transaction: a failed run keeps the old scores.
+                cursor.execute("DELETE FROM telco.churn_scores")
+
+            for chunk in chunks:
+                scores = score_frame(pipeline, chunk)
+                scores["model_name"] = os.path.basename(model_name)
+                scores["scored_at"] = scored_at
+
+                if to_table:
+                    backend.bulk_insert(cursor, "telco.churn_scores", SCORE_COLUMNS, scores[SCORE_COLUMNS], Config.BATCH_SIZE)
+                else:
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    table = pa.Table.from_pandas(scores[SCORE_COLUMNS], preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output, table.schema)
+                    writer.write_table(table)
+
+                total += len(scores)
+                print(f"Scored {total} customers ({total / (time.perf_counter() - start):.0f}/s)...")
+
+            if to_table:
+                transaction.commit()
+        except Exception:
+            if to_table:
+                transaction.rollback()
+            raise
+        finally:
+            cursor.close()
+            if writer:
+                writer.close()
+
+    target = "telco.churn_scores" if to_table else output
+    print(f"Batch scoring finished: {total} customers written to {target}.")
+
+
+# ==========================================
+# 4. PREDICTION ENGINE
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score customers with the saved churn model.")
+    parser.add_argument("--batch", action="store_true", help="score a whole source instead of prompting")
+    parser.add_argument("--source", default="db", help="'db' (star schema) or the path of a raw CSV extract")
+    parser.add_argument("--output", default="table", help="'table' (telco.churn_scores) or a .parquet path")
+    parser.add_argument("--chunk-size", type=int, default=Config.CHUNK_SIZE)
+    args = parser.parse_args()
+
     # 1. Load Model
     pipeline, model_name = load_best_model()
+
+    if args.batch:
+        batch_score(pipeline, model_name, args.source, args.output, args.chunk_size)
+        sys.exit()
     
     while True:
         # 2. Get Data
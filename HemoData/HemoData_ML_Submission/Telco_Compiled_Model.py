@@ -0,0 +1,156 @@
+import argparse
+import math
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+# ==========================================
+# 1. EXPORT: FOLD THE PIPELINE INTO ARRAYS
+# ==========================================
+def compile_pipeline(pipeline, path):
+    # Only logistic winners fold into a weight table; everything else keeps the pipeline.
+    # Other linear models (e.g. SVC's Platt-scaled probabilities) are not a sigmoid of coef_.
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    logistic = isinstance(model, LogisticRegression) or (
+        isinstance(model, SGDClassifier) and model.loss == "log_loss"
+    )
+    if not logistic or model.coef_.shape[0] != 1:
+        raise ValueError(f"{type(model).__name__} is not a binary LogisticRegression or log-loss SGDClassifier")
+
+    num = preprocessor.named_transformers_["num"]
+    cat = preprocessor.named_transformers_["cat"]
+    encoder = cat.named_steps["encoder"]
+    if encoder.drop_idx_ is not None:
+        raise ValueError("OneHotEncoder(drop=...) is not supported")
+
+    num_features = list(preprocessor.transformers_[0][2])
+    cat_features = list(preprocessor.transformers_[1][2])
+    weights = model.coef_[0]
+    num_weights = weights[:len(num_features)]
+
+    # (x - mean) / scale * w  ==  x * (w / scale) - mean * (w / scale)
+    scaler = num.named_steps["scaler"]
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(len(num_features))
+    scale = scaler.scale_ if scaler.with_std else np.ones(len(num_features))
+    folded = num_weights / scale
+
+    arrays = {
+        "num_features": np.array(num_features),
+        "num_weights": folded,
+        "num_fill": num.named_steps["imputer"].statistics_.astype(float),
+        "intercept": np.array([model.intercept_[0] - np.dot(mean, folded)]),
+        "cat_features": np.array(cat_features),
+        "cat_fill": np.array([str(cat.named_steps["imputer"].fill_value)]),
+        "classes": np.asarray(model.classes_),
+    }
+
+    # One weight per known category; unknown categories one-hot to zeros, so weigh 0
+    offset = len(num_features)
+    for i, categories in enumerate(encoder.categories_):
+        arrays[f"cat_{i}_categories"] = categories.astype(str)
+        arrays[f"cat_{i}_weights"] = weights[offset:offset + len(categories)]
+        offset += len(categories)
+
+    np.savez(path, **arrays)
+    return path
+
+
+# ==========================================
+# 2. PREDICTOR (DICT OR ARRAY INPUT)
+# ==========================================
+class CompiledChurnModel:
+
+    def __init__(self, path):
+        data = np.load(path)
+        self.num_features = [str(f) for f in data["num_features"]]
+        self.cat_features = [str(f) for f in data["cat_features"]]
+        self.num_weights = data["num_weights"]
+        self.num_fill = data["num_fill"]
+        self.intercept = float(data["intercept"][0])
+        self.cat_fill = str(data["cat_fill"][0])
+        self.classes = data["classes"]
+        self.categories = [data[f"cat_{i}_categories"] for i in range(len(self.cat_features))]
+        self.cat_weights = [data[f"cat_{i}_weights"] for i in range(len(self.cat_features))]
+
+        # Plain Python tables for the single-customer path (no NumPy call overhead)
+        self.num_table = list(zip(self.num_features, self.num_weights.tolist(), self.num_fill.tolist()))
+        self.cat_table = [
+            (name, dict(zip(categories.tolist(), weights.tolist())))
+            for name, categories, weights in zip(self.cat_features, self.categories, self.cat_weights)
+        ]
+
+    def predict_proba_one(self, customer):
+        z = self.intercept
+        for name, weight, fill in self.num_table:
+            value = customer.get(name)
+            if value is None or value != value:
+                value = fill
+            z += weight * value
+        for name, table in self.cat_table:
+            value = customer.get(name)
+            z += table.get(self.cat_fill if value is None or value != value else str(value), 0.0)
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def predict_one(self, customer):
+        return int(self.predict_proba_one(customer) >= 0.5)
+
+    def predict_proba(self, num, cat):
+        # num: (n, len(num_features)) numbers; cat: (n, len(cat_features)) strings
+        num = np.array(num, dtype=float)
+        num = np.where(np.isnan(num), self.num_fill, num)
+        z = self.intercept + num @ self.num_weights
+
+        cat = np.asarray(cat, dtype=object)
+        for j, (categories, weights) in enumerate(zip(self.categories, self.cat_weights)):
+            values = pd.Series(cat[:, j]).fillna(self.cat_fill).astype(str).to_numpy()
+            # categories_ are sorted, so a binary search finds each value's column
+            idx = np.searchsorted(categories, values).clip(0, len(categories) - 1)
+            known = categories[idx] == values
+            z += np.where(known, weights[idx], 0.0)
+
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_proba_frame(self, df):
+        return self.predict_proba(df[self.num_features].to_numpy(dtype=float), df[self.cat_features].to_numpy())
+
+
+# ==========================================
+# 3. CHECK AGAINST THE ORIGINAL PIPELINE
+# ==========================================
+def max_difference(pipeline, compiled, df):
+    expected = pipeline.predict_proba(df)[:, list(pipeline.classes_).index(1)]
+    return float(np.max(np.abs(expected - compiled.predict_proba_frame(df))))
+
+
+# ==========================================
+# 4. MAIN EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a saved linear churn pipeline to a compiled .npz predictor.")
+    parser.add_argument("model", nargs="?", help="a saved pipeline file; defaults to the registry's current model")
+    parser.add_argument("--out", help="defaults to the model path with .npz")
+    parser.add_argument("--check-rows", type=int, default=1000,
+                        help="snapshot rows scored by both paths to confirm they agree (0 to skip)")
+    args = parser.parse_args()
+
+    if args.model:
+        pipeline, model_path = joblib.load(args.model), args.model
+    else:
+        from Telco_Model_Registry import REGISTRY_DIR, load_model
+        pipeline, entry = load_model()
+        model_path = os.path.join(REGISTRY_DIR, entry["file"])
+
+    out = compile_pipeline(pipeline, args.out or os.path.splitext(model_path)[0] + ".npz")
+    print(f"Compiled predictor written to '{out}'.")
+
+    if args.check_rows:
+        from Telco_Snapshot_Cache import load_snapshot
+        sample = load_snapshot(refresh="never").head(args.check_rows)
+        bool_cols = sample.select_dtypes(include=['bool']).columns
+        sample[bool_cols] = sample[bool_cols].astype(int)
+        print(f"Max probability difference vs pipeline on {len(sample)} rows: "
+              f"{max_difference(pipeline, CompiledChurnModel(out), sample):.2e}")
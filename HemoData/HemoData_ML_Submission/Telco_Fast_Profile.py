@@ -0,0 +1,395 @@
+import hashlib
+import html
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from Telco_Snapshot_Cache import CACHE_DIR, load_snapshot_table, read_manifest
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+CHUNK_ROWS = 100000       # rows converted to pandas at a time
+QUANTILE_K = 256          # items kept per quantile-sketch level (rank error ~1%)
+HLL_PRECISION = 12        # 4096 registers: ~1.6% distinct-count error
+TOP_VALUES = 50           # heavy hitters tracked per categorical column
+HISTOGRAM_BINS = 20
+SAMPLE_PER_STRATUM = 5000 # rows kept per target class for the correlations
+
+_rng = np.random.default_rng(42)
+
+
+# ==========================================
+# 2. MERGEABLE SKETCHES
+# ==========================================
+class Moments:
+    # Count / mean / variance / min / max, merged with Chan's parallel update
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = np.inf, -np.inf
+
+    def update(self, values):
+        if len(values):
+            other = Moments()
+            other.n, other.mean = len(values), float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            other.min, other.max = float(values.min()), float(values.max())
+            self.merge(other)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    @property
+    def std(self):
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else 0.0
+
+
+class QuantileSketch:
+    # KLL-style compactors: level h holds at most k items, each standing for 2**h values
+
+    def __init__(self, k=QUANTILE_K):
+        self.k = k
+        self.levels = [np.empty(0)]
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=float)])
+        self.compress()
+
+    def merge(self, other):
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.compress()
+
+    def compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                even = len(items) - len(items) % 2
+                # A random half of each sorted pair moves up a level with double weight
+                promoted = items[_rng.integers(2):even:2]
+                self.levels[h] = items[even:]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        return items, weights
+
+    def quantiles(self, qs):
+        items, weights = self.weighted()
+        if not len(items):
+            return [np.nan] * len(qs)
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1]).clip(0, len(items) - 1)
+        return items[order][idx].tolist()
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        items, weights = self.weighted()
+        counts, edges = np.histogram(items, bins=bins, weights=weights)
+        return counts.round().astype(int), edges
+
+
+class DistinctSketch:
+    # HyperLogLog: registers merge by element-wise max
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Bit length from the exact 32-bit halves (frexp's exponent is the bit length)
+        high, low = (rest >> np.uint64(32)).astype(float), (rest & np.uint64(0xFFFFFFFF)).astype(float)
+        bits = np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+        rank = (64 - self.p) - bits + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate while many registers are still empty
+        return int(round(m * np.log(m / zeros))) if raw <= 2.5 * m and zeros else int(round(raw))
+
+
+class TopValues:
+    # Misra-Gries heavy hitters: exact for columns with at most `capacity` values
+
+    def __init__(self, capacity=TOP_VALUES):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts()
+        self.merge_counts(dict(zip(counts.index.astype(str), counts.to_numpy().tolist())))
+
+    def merge(self, other):
+        self.merge_counts(other.counts)
+
+    def merge_counts(self, counts):
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+
+    def top(self, n=10):
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+
+class StratifiedSample:
+    # Bottom-k by random priority within each stratum: a uniform sample per class that merges
+
+    def __init__(self, stratum, size=SAMPLE_PER_STRATUM):
+        self.stratum = stratum
+        self.size = size
+        self.rows = None
+
+    def update(self, df):
+        self.merge_rows(df.assign(_priority=_rng.random(len(df))))
+
+    def merge(self, other):
+        if other.rows is not None:
+            self.merge_rows(other.rows)
+
+    def merge_rows(self, rows):
+        rows = rows if self.rows is None else pd.concat([self.rows, rows], ignore_index=True)
+        self.rows = (rows.sort_values("_priority")
+                     .groupby(self.stratum, sort=False, observed=True).head(self.size)
+                     .reset_index(drop=True))
+
+    def frame(self):
+        return self.rows.drop(columns="_priority") if self.rows is not None else pd.DataFrame()
+
+
+# ==========================================
+# 3. COLUMN AND TABLE PROFILES
+# ==========================================
+class ColumnProfile:
+
+    def __init__(self, numeric):
+        self.numeric = numeric
+        self.count = 0
+        self.nulls = 0
+        self.distinct = DistinctSketch()
+        if numeric:
+            self.moments = Moments()
+            self.quantiles = QuantileSketch()
+        else:
+            self.top = TopValues()
+
+    def update(self, col):
+        self.count += len(col)
+        values = col.dropna()
+        self.nulls += len(col) - len(values)
+        self.distinct.update(values.to_numpy())
+        if self.numeric:
+            values = values.to_numpy(dtype=float)
+            self.moments.update(values)
+            self.quantiles.update(values)
+        else:
+            self.top.update(values)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.top.merge(other.top)
+
+    def summary(self):
+        row = {
+            "type": "numeric" if self.numeric else "categorical",
+            "count": self.count,
+            "missing": self.nulls,
+            "missing_pct": round(100 * self.nulls / self.count, 2) if self.count else 0.0,
+            "distinct_approx": self.distinct.estimate(),
+        }
+        if self.numeric:
+            p5, p25, p50, p75, p95 = self.quantiles.quantiles([0.05, 0.25, 0.5, 0.75, 0.95])
+            row.update(mean=self.moments.mean, std=self.moments.std, min=self.moments.min,
+                       p5=p5, p25=p25, median=p50, p75=p75, p95=p95, max=self.moments.max)
+        else:
+            value, count = (self.top.top(1) or [(None, 0)])[0]
+            row.update(top=value, top_count=count)
+        return row
+
+
+class TableProfile:
+
+    def __init__(self, schema, stratum, sample_size=SAMPLE_PER_STRATUM):
+        self.rows = 0
+        self.columns = {
+            field.name: ColumnProfile(pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+                                      or pa.types.is_boolean(field.type) or pa.types.is_decimal(field.type))
+            for field in schema
+        }
+        self.sample = StratifiedSample(stratum, sample_size) if stratum in self.columns else None
+
+    def update(self, df):
+        self.rows += len(df)
+        for name, profile in self.columns.items():
+            profile.update(df[name])
+        if self.sample:
+            self.sample.update(df)
+
+    def merge(self, other):
+        self.rows += other.rows
+        for name, profile in self.columns.items():
+            profile.merge(other.columns[name])
+        if self.sample:
+            self.sample.merge(other.sample)
+
+    def summary(self):
+        return pd.DataFrame({name: p.summary() for name, p in self.columns.items()}).T
+
+    def correlations(self):
+        # Only the bounded sample is correlated, never the full table
+        sample = self.sample.frame() if self.sample else pd.DataFrame()
+        if sample.empty:
+            return pd.DataFrame(), pd.Series(dtype=float)
+
+        numeric = [n for n, p in self.columns.items() if p.numeric]
+        spearman = sample[numeric].astype(float).corr(method="spearman")
+
+        # Cramér's V of each categorical column against the stratum (the target);
+        # ID-like columns would look perfectly associated in any sample, so they are skipped
+        cramers = {}
+        for name in (n for n, p in self.columns.items() if not p.numeric and p.distinct.estimate() <= TOP_VALUES):
+            table = pd.crosstab(sample[name], sample[self.sample.stratum])
+            if min(table.shape) < 2:
+                continue
+            expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.to_numpy().sum()
+            chi2 = ((table.to_numpy() - expected) ** 2 / expected).sum()
+            cramers[name] = float(np.sqrt(chi2 / table.to_numpy().sum() / (min(table.shape) - 1)))
+        return spearman, pd.Series(cramers, name="cramers_v").sort_values(ascending=False)
+
+
+# ==========================================
+# 4. PROFILE THE SNAPSHOT (ONE PASS, CACHED PER PART)
+# ==========================================
+def profile_part(path, columns, stratum, sample_size):
+    # Memory-mapped part; only CHUNK_ROWS rows are ever materialised in pandas
+    with pa.memory_map(path, "r") as source:
+        table = ipc.open_file(source).read_all()
+        table = table.select(columns) if columns else table
+        profile = TableProfile(table.schema, stratum, sample_size)
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            profile.update(batch.to_pandas())
+    return profile
+
+
+def profile_snapshot(columns=None, refresh="auto", stratum="churn", sample_size=SAMPLE_PER_STRATUM):
+    """Profile the cached star join part by part and merge the sketches.
+
+    Each part's profile is cached under snapshot_cache/profiles, keyed by the part
+    file and the settings, so an appended snapshot only profiles its new part.
+    """
+    load_snapshot_table(refresh)
+    manifest = read_manifest()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    settings = json.dumps([columns, stratum, sample_size, QUANTILE_K, HLL_PRECISION, TOP_VALUES])
+    profile, reused = None, 0
+    for part in manifest["parts"]:
+        path = os.path.join(CACHE_DIR, part)
+        stat = os.stat(path)
+        key = hashlib.sha1(f"{part}|{stat.st_size}|{stat.st_mtime_ns}|{settings}".encode()).hexdigest()[:16]
+        cached = os.path.join(PROFILE_DIR, f"{os.path.splitext(part)[0]}-{key}.pkl")
+
+        if os.path.exists(cached):
+            with open(cached, "rb") as f:
+                part_profile = pickle.load(f)
+            reused += 1
+        else:
+            part_profile = profile_part(path, columns, stratum, sample_size)
+            with open(cached, "wb") as f:
+                pickle.dump(part_profile, f)
+
+        if profile is None:
+            profile = part_profile
+        else:
+            profile.merge(part_profile)
+
+    print(f"Profiled {len(manifest['parts'])} snapshot parts ({reused} from cache).")
+    return profile
+
+
+# ==========================================
+# 5. HTML REPORT
+# ==========================================
+def histogram_html(counts, edges):
+    peak = max(int(counts.max()), 1)
+    rows = "".join(
+        f"<tr><td>{lo:,.2f} – {hi:,.2f}</td><td>{c:,}</td>"
+        f"<td><div style='background:#4c78a8;height:10px;width:{200 * c // peak}px'></div></td></tr>"
+        for lo, hi, c in zip(edges[:-1], edges[1:], counts)
+    )
+    return f"<table>{rows}</table>"
+
+
+def write_report(profile, path, title, seconds):
+    spearman, cramers = profile.correlations()
+    parts = [
+        f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        f"<p>{profile.rows:,} rows, {len(profile.columns)} columns; profiled in {seconds:.2f}s. "
+        f"Quantiles and distinct counts are sketch estimates; correlations use a sample stratified "
+        f"by '{profile.sample.stratum if profile.sample else '-'}'.</p>",
+        "<h2>Columns</h2>", profile.summary().to_html(float_format=lambda v: f"{v:,.3f}", na_rep=""),
+    ]
+    for name, col in profile.columns.items():
+        parts.append(f"<h3>{html.escape(name)}</h3>")
+        if col.numeric:
+            parts.append(histogram_html(*col.quantiles.histogram()))
+        else:
+            top = pd.DataFrame(col.top.top(), columns=["value", "count"])
+            parts.append(top.to_html(index=False))
+    if not spearman.empty:
+        parts += ["<h2>Spearman correlations (sample)</h2>", spearman.round(3).to_html()]
+    if not cramers.empty:
+        parts += ["<h2>Cramér's V vs target (sample)</h2>", cramers.round(3).to_frame().to_html()]
+    parts.append("</body></html>")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+def fast_profile(columns, path, title, refresh="auto", sample_size=SAMPLE_PER_STRATUM):
+    start = time.perf_counter()
+    profile = profile_snapshot(columns, refresh, sample_size=sample_size)
+    write_report(profile, path, title, time.perf_counter() - start)
+    return profile
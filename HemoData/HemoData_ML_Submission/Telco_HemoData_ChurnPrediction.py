@@ -1,8 +1,17 @@
 import pandas as pd
-import pyodbc
-import joblib
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
 import warnings
-from sklearn.model_selection import train_test_split
+from joblib import Memory
+from sklearn.base import clone
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables the import below)
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
@@ -20,37 +29,23 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neural_network import MLPClassifier
 
+# Shared DB backend layer (SQL Server / SQLite / DuckDB) lives with the ETL
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "HemoDataSubmission"))
+from DBBackend import get_backend
+from Telco_Snapshot_Cache import load_snapshot
+from Telco_Model_Registry import register_model
+from Telco_Model_Evaluation import cross_validate
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
 # ==========================================
 # 1. CONFIG & DATA FETCH
 # ==========================================
-DB_CONN_STR = (
-    r"Driver={ODBC Driver 17 for SQL Server};"
-    r"Server=MSI\SQLEXPRESS;"
-    r"Database=HemoData_Telco_DB;"
-    r"Trusted_Connection=yes;"
-)
-
-def fetch_data():
-    print("Fetching data from SQL Server...")
-    query = """
-        SELECT 
-            f.churn, f.tenure, f.contract, f.paperless_billing, f.payment_method, 
-            CAST(f.total_charges AS FLOAT) as total_charges,
-            c.gender, c.senior_citizen, c.partner, c.dependents,
-            s.phone_service, s.multiple_lines, s.internet_service,
-            s.online_security, s.online_backup, s.device_protection,
-            s.tech_support, s.streaming_tv, s.streaming_movies,
-            CAST(s.monthly_charges AS FLOAT) as monthly_charges
-        FROM telco.fact_subscription f
-        JOIN telco.dim_customer c ON f.customer_dim_id = c.customer_dim_id
-        JOIN telco.dim_service s  ON f.service_dim_id = s.service_dim_id
-    """
-    conn = pyodbc.connect(DB_CONN_STR)
-    df = pd.read_sql(query, conn)
-    conn.close()
+def fetch_data(refresh="auto"):
+    # Served from the local Arrow snapshot; only new facts are pulled from the DB
+    print(f"Fetching data from {get_backend().name} (snapshot cache)...")
+    df = load_snapshot(refresh=refresh).drop(columns=["fact_id"])
     
     # Ensure boolean flags are integers
     bool_cols = df.select_dtypes(include=['bool']).columns
@@ -69,9 +64,183 @@ preprocessor = ColumnTransformer(transformers=[
 ])
 
 # ==========================================
-# 3. RUN THE ULTIMATE TOURNAMENT
+# 3. FIT PREPROCESSING ONCE (CACHED ON DISK)
+# ==========================================
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tournament_cache")
+memory = Memory(CACHE_DIR, verbose=0)
+
+# Candidates that may run longer than the default budget (seconds)
+TIME_BUDGETS = {
+    "SVM (Linear)": 900,
+    "SVM (RBF)":    900,
+}
+
+
+@memory.cache
+def fit_preprocessor(X_train, y_train, X_test):
+    # Same split + same data = same transform, so repeat runs skip this entirely
+    fitted = clone(preprocessor).fit(X_train, y_train)
+    return fitted, fitted.transform(X_train), fitted.transform(X_test)
+
+
+# ==========================================
+# 4. ONE CANDIDATE (RUNS IN ITS OWN PROCESS)
+# ==========================================
+def evaluate_candidate(name, algo, Xt_train, y_train, Xt_test, y_test, results):
+    try:
+        start = time.perf_counter()
+        algo.fit(Xt_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = algo.predict(Xt_test)
+        predict_seconds = time.perf_counter() - start
+
+        if hasattr(algo, "predict_proba"):
+            roc = roc_auc_score(y_test, algo.predict_proba(Xt_test)[:, 1])
+        else:
+            roc = 0.0
+
+        results.put((name, {
+            "f1": f1_score(y_test, y_pred),
+            "roc_auc": roc,
+            "accuracy": accuracy_score(y_test, y_pred),
+            "fit_seconds": fit_seconds,
+            "predict_ms_per_1k": predict_seconds / len(y_test) * 1e6,
+            "model": algo,
+        }))
+    except Exception as e:
+        results.put((name, {"error": str(e)}))
+
+
+def run_tournament(models, Xt_train, y_train, Xt_test, y_test, jobs, time_budget):
+    # Plain processes rather than a pool: an overrunning candidate can be terminated
+    results = mp.Queue()
+    pending = list(models.items())
+    running = {}
+    outcomes = {}
+
+    def collect(timeout):
+        try:
+            name, outcome = results.get(timeout=timeout)
+            outcomes[name] = outcome
+        except queue.Empty:
+            pass
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            name, algo = pending.pop(0)
+            proc = mp.Process(target=evaluate_candidate,
+                              args=(name, algo, Xt_train, y_train, Xt_test, y_test, results))
+            proc.start()
+            running[name] = (proc, time.monotonic() + TIME_BUDGETS.get(name, time_budget))
+
+        collect(timeout=0.5)
+
+        for name, (proc, deadline) in list(running.items()):
+            if name in outcomes:
+                proc.join()
+            elif time.monotonic() > deadline:
+                proc.terminate()
+                proc.join()
+                outcomes[name] = {"error": f"TIMEOUT after {TIME_BUDGETS.get(name, time_budget)}s"}
+            elif not proc.is_alive():
+                # The result may still be in flight from a process that just exited
+                collect(timeout=1)
+                if name not in outcomes:
+                    outcomes[name] = {"error": f"worker exited with code {proc.exitcode}"}
+            else:
+                continue
+            del running[name]
+
+    return outcomes
+
+
+# ==========================================
+# 5. SUCCESSIVE-HALVING TUNING OF THE TOP CANDIDATES
+# ==========================================
+# name -> (search space, halving resource, max resource). Tree ensembles grow
+# n_estimators / max_iter round by round; the rest get more training rows.
+SEARCH_SPACES = {
+    "LogisticRegression": ({"C": loguniform(1e-3, 1e2)}, "n_samples", "auto"),
+    "DecisionTree":       ({"max_depth": randint(2, 20), "min_samples_leaf": randint(1, 50),
+                            "criterion": ["gini", "entropy"]}, "n_samples", "auto"),
+    "RandomForest":       ({"max_depth": [None, 5, 10, 15, 20], "min_samples_leaf": randint(1, 20),
+                            "max_features": ["sqrt", "log2", None]}, "n_estimators", 500),
+    "GradientBoosting":   ({"learning_rate": loguniform(0.01, 0.3), "max_depth": randint(2, 6),
+                            "subsample": uniform(0.6, 0.4)}, "n_estimators", 500),
+    "HistGradientBoost":  ({"learning_rate": loguniform(0.01, 0.3), "max_leaf_nodes": randint(15, 63),
+                            "l2_regularization": loguniform(1e-4, 10)}, "max_iter", 500),
+    "AdaBoost":           ({"learning_rate": loguniform(0.01, 1.0)}, "n_estimators", 500),
+    "SVM (Linear)":       ({"C": loguniform(1e-2, 1e2)}, "n_samples", "auto"),
+    "SVM (RBF)":          ({"C": loguniform(1e-2, 1e2), "gamma": loguniform(1e-4, 1)}, "n_samples", "auto"),
+    "KNN":                ({"n_neighbors": randint(3, 51), "weights": ["uniform", "distance"]}, "n_samples", "auto"),
+    "NaiveBayes":         ({"var_smoothing": loguniform(1e-12, 1e-6)}, "n_samples", "auto"),
+    "NeuralNet (MLP)":    ({"alpha": loguniform(1e-5, 1e-1), "learning_rate_init": loguniform(1e-4, 1e-2),
+                            "hidden_layer_sizes": [(50,), (100,), (100, 50)]}, "n_samples", "auto"),
+}
+
+# Iterative learners stop on a held-out slice instead of running every round.
+# warm_start is left off: the search clones a fresh estimator for every
+# candidate, fold and halving round, so no fitted state would carry over.
+EARLY_STOPPING = {
+    "GradientBoosting":  {"n_iter_no_change": 10, "validation_fraction": 0.1},
+    "HistGradientBoost": {"early_stopping": True},
+    "NeuralNet (MLP)":   {"early_stopping": True},
+}
+
+
+def build_search(name, algo, n_jobs):
+    space, resource, max_resources = SEARCH_SPACES[name]
+    estimator = clone(algo).set_params(**EARLY_STOPPING.get(name, {}))
+    return HalvingRandomSearchCV(
+        estimator, space,
+        resource=resource, max_resources=max_resources, factor=3,
+        cv=StratifiedKFold(n_splits=5, shuffle=True, random_state=42),
+        scoring="f1", n_jobs=n_jobs, random_state=42,
+    )
+
+
+def save_search_results(tuned, directory):
+    os.makedirs(directory, exist_ok=True)
+    best = {}
+    for name, outcome in tuned.items():
+        if "error" in outcome:
+            best[name] = {"error": outcome["error"]}
+            continue
+        search = outcome["model"]
+        safe = name.replace(' ', '_').replace('(', '').replace(')', '')
+        pd.DataFrame(search.cv_results_).to_csv(os.path.join(directory, f"{safe}.csv"), index=False)
+        best[name] = {
+            "best_params": {k: v if isinstance(v, (int, float, str, type(None))) else str(v)
+                            for k, v in search.best_params_.items()},
+            "cv_f1": float(search.best_score_),
+            "test_f1": float(outcome["f1"]),
+            "candidates": len(search.cv_results_["params"]),
+            "iterations": int(search.n_iterations_),
+        }
+
+    with open(os.path.join(directory, "best_params.json"), "w") as f:
+        json.dump(best, f, indent=2)
+
+
+# ==========================================
+# 6. RUN THE ULTIMATE TOURNAMENT
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train every candidate model and save the best one.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="candidates trained at once")
+    parser.add_argument("--time-budget", type=int, default=300,
+                        help="seconds per candidate before it is abandoned (see TIME_BUDGETS)")
+    parser.add_argument("--leaderboard", default="tournament_leaderboard.csv")
+    parser.add_argument("--tune-top", type=int, default=0,
+                        help="tune this many of the best candidates with successive halving (0 to skip)")
+    parser.add_argument("--tune-budget", type=int, default=1800, help="seconds per tuning search")
+    parser.add_argument("--tuning-dir", default="tuning_results")
+    parser.add_argument("--cv-folds", type=int, default=0,
+                        help="rank by mean F1 over this many stratified folds of the training split (0 = hold-out F1)")
+    args = parser.parse_args()
+
     df = fetch_data()
     X = df.drop(columns=['churn'])
     y = df['churn']
@@ -94,58 +263,96 @@ if __name__ == "__main__":
         "NeuralNet (MLP)":    MLPClassifier(hidden_layer_sizes=(100,50), max_iter=500, random_state=42)
     }
     
-    print(f"\nTraining {len(models)} models... this might take a minute.")
-    print("\n" + "="*70)
-    print(f"{'Model Name':<20} | {'F1 Score':<10} | {'ROC-AUC':<10} | {'Accuracy':<10}")
-    print("="*70)
+    print(f"\nPreprocessing once (cache: {CACHE_DIR})...")
+    fitted_preprocessor, Xt_train, Xt_test = fit_preprocessor(X_train, y_train, X_test)
+
+    print(f"Training {len(models)} models on {args.jobs} cores... this might take a minute.")
+    outcomes = run_tournament(models, Xt_train, y_train, Xt_test, y_test, args.jobs, args.time_budget)
+    contenders = list(models)
+
+    if args.tune_top:
+        ranked = sorted((n for n in models if "error" not in outcomes[n]),
+                        key=lambda n: outcomes[n]["f1"], reverse=True)[:args.tune_top]
+        # Searches run side by side, sharing the cores between them
+        n_jobs = max(1, args.jobs // max(1, len(ranked)))
+        searches = {f"{n} (tuned)": build_search(n, models[n], n_jobs) for n in ranked}
+
+        print(f"Tuning {', '.join(ranked)} with successive halving ({args.tune_budget}s budget each)...")
+        tuned = run_tournament(searches, Xt_train, y_train, Xt_test, y_test, len(searches), args.tune_budget)
+        save_search_results(tuned, args.tuning_dir)
+        print(f"Search results written to '{args.tuning_dir}'.")
+
+        for outcome in tuned.values():
+            if "model" in outcome:
+                outcome["model"] = outcome["model"].best_estimator_
+        outcomes.update(tuned)
+        contenders += list(searches)
+
+    if args.cv_folds:
+        # A single split is noisy: re-fit every surviving contender on shared-memory folds,
+        # preprocessing included, so each fold's scaler / encoder never sees its validation rows.
+        # Each contender gets the same per-candidate budget it had in the tournament
+        finished = {n: outcomes[n]["model"] for n in contenders if "error" not in outcomes[n]}
+        print(f"Cross-validating {len(finished)} models on {args.cv_folds} folds...")
+        cv_summary, _ = cross_validate(finished, X_train, y_train, args.cv_folds, args.jobs, preprocessor=preprocessor,
+                                       time_budget=args.time_budget, budgets=TIME_BUDGETS)
+        for name, row in cv_summary.iterrows():
+            if pd.isna(row["f1_mean"]):
+                print(f"  {name}: cross-validation failed ({row['error']})")
+                continue
+            outcomes[name].update(cv_f1=row["f1_mean"], cv_f1_std=row["f1_std"],
+                                  cv_roc_auc=row["roc_auc_mean"], cv_roc_auc_std=row["roc_auc_std"])
+    rank_by = "cv_f1" if args.cv_folds else "f1"
+
+    print("\n" + "="*100)
+    print(f"{'Model Name':<20} | {'F1 Score':<10} | {'ROC-AUC':<10} | {'Accuracy':<10} | {'Fit (s)':<10} | {'Predict (ms/1k)':<15}"
+          + (" | CV F1 (mean ± std)" if args.cv_folds else ""))
+    print("="*100)
     
     # Variables to track the winner
     best_score = -1
     best_model_name = ""
     best_pipeline = None
+    leaderboard = []
 
-    for name, algo in models.items():
-        try:
-            # Build Pipeline
-            pipeline = Pipeline(steps=[('preprocessor', preprocessor), ('model', algo)])
-            
-            # Train
-            pipeline.fit(X_train, y_train)
-            
-            # Predict
-            y_pred = pipeline.predict(X_test)
-            
-            # Metrics
-            if hasattr(pipeline, "predict_proba"):
-                y_prob = pipeline.predict_proba(X_test)[:, 1]
-                roc = roc_auc_score(y_test, y_prob)
-            else:
-                roc = 0.0 
-            
-            f1 = f1_score(y_test, y_pred)
-            acc = accuracy_score(y_test, y_pred)
-            
-            print(f"{name:<20} | {f1:.4f}     | {roc:.4f}     | {acc:.4f}")
-            
-            # CHECK IF THIS IS THE NEW CHAMPION
-            if f1 > best_score:
-                best_score = f1
-                best_model_name = name
-                best_pipeline = pipeline
-            
-        except Exception as e:
-            print(f"{name:<20} | FAILED: {str(e)}")
-
-    print("-" * 70)
+    for name in contenders:
+        outcome = outcomes[name]
+        if "error" in outcome:
+            print(f"{name:<20} | FAILED: {outcome['error']}")
+            leaderboard.append({"model": name, "error": outcome["error"]})
+            continue
+
+        f1, roc, acc = outcome["f1"], outcome["roc_auc"], outcome["accuracy"]
+        cv = f" | {outcome['cv_f1']:.4f} ± {outcome['cv_f1_std']:.4f}" if "cv_f1" in outcome else ""
+        print(f"{name:<20} | {f1:.4f}     | {roc:.4f}     | {acc:.4f}     | "
+              f"{outcome['fit_seconds']:<10.2f} | {outcome['predict_ms_per_1k']:.2f}{cv}")
+        leaderboard.append({"model": name, **{k: v for k, v in outcome.items() if k != "model"}})
+
+        # CHECK IF THIS IS THE NEW CHAMPION
+        score = outcome.get(rank_by, -1)
+        if score > best_score:
+            best_score = score
+            best_model_name = name
+            # Same two-step pipeline as before, so the predictor loads it unchanged
+            best_pipeline = Pipeline(steps=[('preprocessor', fitted_preprocessor), ('model', outcome["model"])])
+
+    columns = ["model", "f1", "roc_auc", "accuracy", "fit_seconds", "predict_ms_per_1k",
+               "cv_f1", "cv_f1_std", "cv_roc_auc", "cv_roc_auc_std", "error"]
+    pd.DataFrame(leaderboard, columns=columns).sort_values(rank_by, ascending=False).to_csv(args.leaderboard, index=False)
+    print("-" * 100)
+    print(f"Leaderboard written to '{args.leaderboard}'.")
     
     # SAVE ONLY THE WINNER
     if best_pipeline:
-        print(f"The winner is {best_model_name} with F1 Score: {best_score:.4f}")
-        
-        # Clean filename format
-        filename = f"model_{best_model_name.replace(' ', '_').replace('(', '').replace(')', '')}.pkl"
+        print(f"The winner is {best_model_name} with {'CV ' if args.cv_folds else ''}F1 Score: {best_score:.4f}")
         
-        joblib.dump(best_pipeline, filename)
-        print(f"SAVED: Only the best model was saved to '{filename}'.")
+        winner = next(row for row in leaderboard if row["model"] == best_model_name)
+        entry = register_model(
+            best_pipeline, best_model_name,
+            metrics={k: winner[k] for k in ["f1", "roc_auc", "accuracy", "fit_seconds", "predict_ms_per_1k",
+                                            "cv_f1", "cv_f1_std", "cv_roc_auc", "cv_roc_auc_std"] if k in winner},
+            features={"numeric": NUM_FEAT, "categorical": CAT_FEAT},
+        )
+        print(f"SAVED: Only the best model was registered as v{entry['version']} ('{entry['file']}').")
     else:
         print("No models were trained successfully.")
\ No newline at end of file
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "HemoDataSubmission"))
+from CleaningSchema import TELCO_SCHEMA
+from DBBackend import get_backend
+from Telco_Churn_Prediction import CSV_COLUMNS
+from Telco_HemoData_ChurnPrediction import CAT_FEAT, NUM_FEAT
+from Telco_Model_Registry import REGISTRY_DIR, get_entry, load_model, register_model
+from Telco_Snapshot_Cache import STAR_JOIN_QUERY
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+STATE_PATH = os.path.join(REGISTRY_DIR, "incremental_state.json")
+CHUNK_ROWS = 100000     # fact_id range pulled (and partial_fit) per step
+DRIFT_PSI = 0.2         # population stability index above which a feature has drifted
+METRIC_DROP = 0.05      # F1 drop vs. the baseline of the last retrain that triggers a retrain
+PSI_BINS = 10
+BOOTSTRAP_HOLDOUT = 0.2 # newest share of facts scored (then trained on) to set a baseline
+
+ESTIMATORS = {
+    "sgd": ("SGD (incremental)", lambda: SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)),
+    "nb":  ("NaiveBayes (incremental)", GaussianNB),
+}
+
+# One-hot categories come from the cleaning schema, so they never change between batches
+SCHEMA_NAME = {model: csv for csv, model in CSV_COLUMNS.items()}
+CATEGORIES = [TELCO_SCHEMA[SCHEMA_NAME[c]]["domain"] for c in CAT_FEAT]
+
+
+# ==========================================
+# 2. PREPROCESSING THAT LEARNS BATCH BY BATCH
+# ==========================================
+class IncrementalPreprocessor(BaseEstimator, TransformerMixin):
+
+    def __init__(self, num_features=NUM_FEAT, cat_features=CAT_FEAT, categories=CATEGORIES):
+        self.num_features = num_features
+        self.cat_features = cat_features
+        self.categories = categories
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, "scaler_"):
+            self.scaler_ = StandardScaler()
+            # Fixed categories: fitting on one placeholder row is enough
+            self.encoder_ = OneHotEncoder(categories=self.categories, handle_unknown="ignore", sparse_output=False)
+            self.encoder_.fit(pd.DataFrame([[c[0] for c in self.categories]], columns=self.cat_features))
+        # Running mean / variance over every batch seen so far (NaNs are skipped)
+        self.scaler_.partial_fit(X[self.num_features].astype(float))
+        return self
+
+    def fit(self, X, y=None):
+        for attr in ("scaler_", "encoder_"):
+            if hasattr(self, attr):
+                delattr(self, attr)
+        return self.partial_fit(X, y)
+
+    def transform(self, X):
+        # Missing numbers become the running mean (0 once scaled); missing categories one-hot to zeros
+        num = np.nan_to_num(self.scaler_.transform(X[self.num_features].astype(float)), nan=0.0)
+        cat = self.encoder_.transform(X[self.cat_features].astype(object))
+        return np.hstack([num, cat])
+
+
+def new_pipeline(estimator):
+    _, factory = ESTIMATORS[estimator]
+    return Pipeline(steps=[("preprocessor", IncrementalPreprocessor()), ("model", factory())])
+
+
+def partial_fit(pipeline, X, y, update_scaler=True):
+    # Scaler statistics are updated once per row, not once per epoch
+    preprocessor = pipeline.named_steps["preprocessor"]
+    if update_scaler or not hasattr(preprocessor, "scaler_"):
+        preprocessor.partial_fit(X)
+    pipeline.named_steps["model"].partial_fit(preprocessor.transform(X), y, classes=[0, 1])
+
+
+# ==========================================
+# 3. FACTS NEWER THAN THE WATERMARK
+# ==========================================
+def max_fact_id(backend, conn):
+    return int(backend.read_sql("SELECT COALESCE(MAX(fact_id), 0) FROM telco.fact_subscription", conn).iloc[0, 0])
+
+
+def iter_new_facts(backend, conn, after, upto, chunk_rows=CHUNK_ROWS):
+    for lo in range(after + 1, upto + 1, chunk_rows):
+        chunk = backend.read_sql(f"{STAR_JOIN_QUERY} WHERE f.fact_id BETWEEN {lo} AND {lo + chunk_rows - 1}", conn)
+        bool_cols = chunk.select_dtypes(include=['bool']).columns
+        chunk[bool_cols] = chunk[bool_cols].astype(int)
+        if len(chunk):
+            yield chunk
+
+
+# ==========================================
+# 4. DRIFT PROFILE (MERGEABLE HISTOGRAMS)
+# ==========================================
+class DriftProfile:
+
+    def __init__(self, edges, counts):
+        self.edges = edges      # numeric feature -> inner bin edges
+        self.counts = counts    # feature -> list of bin / category counts
+
+    @classmethod
+    def empty_like(cls, reference):
+        return cls(reference.edges, {f: [0] * len(c) for f, c in reference.counts.items()})
+
+    @classmethod
+    def from_frame(cls, df):
+        # Bin edges are fixed at the first training batch, so later profiles stay comparable
+        quantiles = np.linspace(0, 1, PSI_BINS + 1)[1:-1]
+        edges = {f: np.unique(np.nanquantile(df[f].astype(float), quantiles)).tolist() for f in NUM_FEAT}
+        profile = cls(edges, {})
+        profile.counts = {f: [0] * (len(e) + 1) for f, e in edges.items()}
+        profile.counts.update({f: [0] * (len(c) + 1) for f, c in zip(CAT_FEAT, CATEGORIES)})
+        profile.add(df)
+        return profile
+
+    def add(self, df):
+        for f, edges in self.edges.items():
+            values = df[f].astype(float).dropna().to_numpy()
+            bins = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            self.counts[f] = (np.array(self.counts[f]) + bins).tolist()
+        for f, categories in zip(CAT_FEAT, CATEGORIES):
+            # Last slot collects values outside the schema domain
+            codes = pd.Categorical(df[f], categories=categories).codes
+            bins = np.bincount(np.where(codes < 0, len(categories), codes), minlength=len(categories) + 1)
+            self.counts[f] = (np.array(self.counts[f]) + bins).tolist()
+
+    def psi(self, other):
+        scores = {}
+        for f, expected in self.counts.items():
+            e = np.array(expected, dtype=float) + 0.5
+            a = np.array(other.counts[f], dtype=float) + 0.5
+            e, a = e / e.sum(), a / a.sum()
+            scores[f] = float(np.sum((a - e) * np.log(a / e)))
+        return scores
+
+    def to_dict(self):
+        return {"edges": self.edges, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["edges"], data["counts"])
+
+
+# ==========================================
+# 5. STATE (WATERMARK, BASELINE, REFERENCE)
+# ==========================================
+def read_state():
+    if not os.path.exists(STATE_PATH):
+        return None
+    with open(STATE_PATH) as f:
+        return json.load(f)
+
+
+def write_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+
+def evaluate(pipeline, chunks):
+    y_true, y_prob = [], []
+    for chunk in chunks:
+        y_true.append(chunk["churn"].to_numpy())
+        y_prob.append(pipeline.predict_proba(chunk.drop(columns=["fact_id", "churn"]))[:, 1])
+    y_true, y_prob = np.concatenate(y_true), np.concatenate(y_prob)
+    y_pred = (y_prob >= 0.5).astype(int)
+    return {
+        "f1": f1_score(y_true, y_pred),
+        "roc_auc": roc_auc_score(y_true, y_prob) if len(np.unique(y_true)) > 1 else 0.0,
+        "accuracy": accuracy_score(y_true, y_pred),
+        "rows": len(y_true),
+    }
+
+
+def split_at(chunks, cut):
+    # (facts up to fact_id cut, newer facts); chunks arrive in fact_id order
+    older = [c[c["fact_id"] <= cut] for c in chunks]
+    newer = [c[c["fact_id"] > cut] for c in chunks]
+    return [c for c in older if len(c)], [c for c in newer if len(c)]
+
+
+# ==========================================
+# 6. BOOTSTRAP OR INCREMENTAL UPDATE
+# ==========================================
+def train(pipeline, chunks, epochs, reference=None):
+    # chunks: a list, or a callable returning a fresh iterator for each epoch
+    for epoch in range(epochs):
+        for chunk in (chunks if isinstance(chunks, list) else chunks()):
+            partial_fit(pipeline, chunk.drop(columns=["fact_id", "churn"]), chunk["churn"].to_numpy(),
+                        update_scaler=epoch == 0)
+            if epoch == 0:
+                if reference is None:
+                    reference = DriftProfile.from_frame(chunk)
+                else:
+                    reference.add(chunk)
+    return reference
+
+
+def retrain(estimator="sgd", force=False, epochs=1):
+    backend = get_backend()
+    state = read_state()
+
+    with backend.connection() as conn:
+        upto = max_fact_id(backend, conn)
+        after = state["watermark"] if state else 0
+        if upto <= after:
+            print(f"No facts after fact_id {after}; nothing to do.")
+            return
+
+        if state:
+            # Test-then-train: the current model is scored on the new facts before it sees them.
+            # Loaded into memory, not mapped: partial_fit updates the arrays in place.
+            pipeline, entry = load_model(state["model_version"], mmap_mode=None)
+            name = entry["name"]
+            reference = DriftProfile.from_dict(state["reference"])
+            current = DriftProfile.empty_like(reference)
+            chunks = list(iter_new_facts(backend, conn, after, upto))
+            for chunk in chunks:
+                current.add(chunk)
+            metrics = evaluate(pipeline, chunks)
+            psi = reference.psi(current)
+            drifted = {f: round(v, 3) for f, v in psi.items() if v > DRIFT_PSI}
+            drop = state["baseline"]["f1"] - metrics["f1"]
+
+            print(f"{metrics['rows']} new facts: F1 {metrics['f1']:.4f} (baseline {state['baseline']['f1']:.4f}), "
+                  f"max PSI {max(psi.values()):.3f}")
+            if not (force or drifted or drop > METRIC_DROP):
+                # The watermark stays put, so the next run judges a larger window
+                print("No drift or metric drop above threshold; model left as is.")
+                return
+            print(f"Retraining: drifted={drifted or '-'}, F1 drop={drop:+.4f}, forced={force}")
+            rows = metrics["rows"]
+            # As when bootstrapping: learn the older new facts, score the newest ones for the
+            # baseline (held out, so comparable with the tournament's test F1), then learn them too
+            cut = after + int((upto - after) * (1 - BOOTSTRAP_HOLDOUT))
+            older, holdout = split_at(chunks, cut)
+            reference = train(pipeline, older, epochs, reference)
+            if holdout:
+                metrics = evaluate(pipeline, holdout)
+                reference = train(pipeline, holdout, epochs, reference)
+        else:
+            # First model: train on the older facts, score the newest ones for a baseline, then learn them too
+            name, _ = ESTIMATORS[estimator]
+            cut = after + int((upto - after) * (1 - BOOTSTRAP_HOLDOUT))
+            print(f"No incremental model yet; bootstrapping {name} on facts 1..{cut}, validating on {cut + 1}..{upto}.")
+            pipeline = new_pipeline(estimator)
+            reference = train(pipeline, lambda: iter_new_facts(backend, conn, after, cut), epochs)
+            holdout = list(iter_new_facts(backend, conn, cut, upto))
+            metrics = evaluate(pipeline, holdout)
+            reference = train(pipeline, holdout, epochs, reference)
+            rows = upto - after
+
+    # Scoring only switches to the incremental model if it beats the current one (usually the tournament winner)
+    current = get_entry()
+    promote = current is None or metrics["f1"] > current["metrics"].get("f1", 0.0)
+    entry = register_model(pipeline, name, metrics={k: metrics[k] for k in ("f1", "roc_auc", "accuracy")},
+                           features={"numeric": NUM_FEAT, "categorical": CAT_FEAT}, promote=promote)
+    write_state({
+        "estimator": estimator if not state else state["estimator"],
+        "model_version": entry["version"],
+        "watermark": upto,
+        "rows_trained": (state["rows_trained"] if state else 0) + rows,
+        "baseline": metrics,
+        "reference": reference.to_dict(),
+    })
+    status = "promoted to current" if promote else f"not promoted (current is v{current['version']} {current['name']})"
+    print(f"Registered {name} as v{entry['version']}, {status}; watermark is now fact_id {upto}.")
+
+
+# ==========================================
+# 7. MAIN EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the churn model with facts loaded since the last retrain.")
+    parser.add_argument("--estimator", choices=sorted(ESTIMATORS), default="sgd",
+                        help="partial_fit learner used when bootstrapping")
+    parser.add_argument("--force", action="store_true", help="retrain even without drift or a metric drop")
+    parser.add_argument("--epochs", type=int, default=1, help="passes over the new facts")
+    args = parser.parse_args()
+
+    # Run through the module (not __main__) so the pickled preprocessor class can be
+    # imported again by the scorers that load this model from the registry
+    import Telco_Incremental_Training
+    Telco_Incremental_Training.retrain(args.estimator, args.force, args.epochs)
@@ -0,0 +1,354 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+CV_FOLDS = 5
+CV_SEED = 7   # not 42: the tournament's halving search tuned its candidates on the random_state=42 folds
+PERMUTATION_REPEATS = 5
+EXPLAIN_CHUNK_ROWS = 100000   # customers transformed and attributed at a time
+
+
+# ==========================================
+# 2. SHARED-MEMORY MATRICES
+# ==========================================
+class SharedMatrix:
+    # One copy of the array in shared memory; workers map it instead of unpickling it
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)[...] = array
+        self.spec = (self.shm.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def encode_frame(df):
+    # Raw features as one float matrix: numbers as is, text as category codes (NaN = missing)
+    columns, matrix = [], np.empty((len(df), df.shape[1]))
+    for j, name in enumerate(df.columns):
+        col = df[name]
+        if pd.api.types.is_numeric_dtype(col):
+            columns.append((name, None))
+            matrix[:, j] = col.astype(float).to_numpy()
+        else:
+            codes = pd.Categorical(col)
+            columns.append((name, codes.categories.to_numpy(dtype=object)))
+            matrix[:, j] = np.where(codes.codes < 0, np.nan, codes.codes)
+    return matrix, columns
+
+
+def decode_rows(rows):
+    # The raw DataFrame a pipeline expects, rebuilt from the shared matrix for these rows
+    block = _X[rows]
+    data = {}
+    for j, (name, categories) in enumerate(_columns):
+        if categories is None:
+            data[name] = block[:, j]
+        else:
+            # Code -1 (missing) lands on the trailing NaN
+            data[name] = np.append(categories, np.nan)[np.nan_to_num(block[:, j], nan=-1).astype(int)]
+    return pd.DataFrame(data)
+
+
+# Set once per worker process by the pool initializer
+_X = _y = _model = _columns = None
+_blocks = ()
+
+
+def init_worker(x_spec, y_spec, model=None, columns=None):
+    global _X, _y, _model, _columns, _blocks
+    x_shm, _X = attach(x_spec)
+    y_shm, _y = attach(y_spec)
+    _model = model
+    _columns = columns
+    _blocks = (x_shm, y_shm)   # keeps the mappings alive for the worker's lifetime
+
+
+# ==========================================
+# 3. STRATIFIED K-FOLD ACROSS A PROCESS POOL
+# ==========================================
+@lru_cache(maxsize=4)
+def fold_indices(n_splits, seed):
+    # Every worker derives the same folds from the shared labels; only the fold number is sent
+    return list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(_X, _y))
+
+
+def run_fold(name, estimator, fold, n_splits, seed):
+    train, test = fold_indices(n_splits, seed)[fold]
+    model = clone(estimator)
+    X_train, X_test = (decode_rows(train), decode_rows(test)) if _columns else (_X[train], _X[test])
+
+    start = time.perf_counter()
+    model.fit(X_train, _y[train])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    roc = roc_auc_score(_y[test], model.predict_proba(X_test)[:, 1]) if hasattr(model, "predict_proba") else np.nan
+    return {
+        "model": name,
+        "fold": fold,
+        "f1": f1_score(_y[test], y_pred),
+        "roc_auc": roc,
+        "fit_seconds": fit_seconds,
+        "predict_ms_per_1k": predict_seconds / len(test) * 1e6,
+    }
+
+
+def cross_validate(models, X, y, folds=CV_FOLDS, jobs=None, seed=CV_SEED, preprocessor=None,
+                   time_budget=None, budgets=None):
+    """Score every model on the same stratified folds, one (model, fold) task per worker.
+
+    With a preprocessor, X is the raw feature frame and each fold refits preprocessor + model,
+    so no scaling or encoding statistics leak from the validation rows. Without one, X is an
+    already-transformed feature matrix. Returns (per-model summary, per-fold rows).
+
+    Like the tournament, a model whose folds are not all scored within its budget (budgets[name],
+    else time_budget seconds; None waits forever) is abandoned and reported as a TIMEOUT error.
+    """
+    start = time.perf_counter()
+    rows, errors = [], {}
+    columns = None
+    if preprocessor is not None:
+        X, columns = encode_frame(X)
+        models = {name: Pipeline(steps=[("preprocessor", preprocessor), ("model", estimator)])
+                  for name, estimator in models.items()}
+
+    workers = jobs or os.cpu_count()
+    pending = list(models.items())
+    running = {}      # name -> (fold futures, deadline)
+    abandoned = []    # fold futures of timed-out models, still holding a worker
+    before = set(mp.active_children())
+
+    with SharedMatrix(np.asarray(X, dtype=float)) as x_block, SharedMatrix(np.asarray(y)) as y_block:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(x_block.spec, y_block.spec, None, columns))
+        try:
+            while pending or running:
+                # A model's clock starts when its folds can start, not while it queues behind others
+                busy = sum(not f.done() for f in abandoned) + sum(
+                    not f.done() for futures, _ in running.values() for f in futures)
+                while pending and (not running or busy + folds <= workers):
+                    name, estimator = pending.pop(0)
+                    budget = (budgets or {}).get(name, time_budget)
+                    running[name] = (
+                        [pool.submit(run_fold, name, estimator, fold, folds, seed) for fold in range(folds)],
+                        time.monotonic() + budget if budget else None,
+                    )
+                    busy += folds
+
+                wait([f for futures, _ in running.values() for f in futures],
+                     timeout=0.5, return_when=FIRST_COMPLETED)
+
+                for name, (futures, deadline) in list(running.items()):
+                    if all(f.done() for f in futures):
+                        for future in futures:
+                            try:
+                                rows.append(future.result())
+                            except Exception as e:
+                                errors[name] = str(e)
+                    elif deadline and time.monotonic() > deadline:
+                        for future in futures:
+                            future.cancel()
+                        abandoned += futures
+                        errors[name] = f"TIMEOUT after {(budgets or {}).get(name, time_budget)}s"
+                    else:
+                        continue
+                    del running[name]
+        finally:
+            pool.shutdown(wait=not abandoned, cancel_futures=True)
+            if abandoned:
+                # A fit cannot be interrupted, so the workers still running one are stopped outright
+                for proc in set(mp.active_children()) - before:
+                    proc.terminate()
+                    proc.join()
+
+    per_fold = pd.DataFrame(rows, columns=["model", "fold", "f1", "roc_auc", "fit_seconds", "predict_ms_per_1k"])
+    summary = per_fold.groupby("model").agg(
+        f1_mean=("f1", "mean"), f1_std=("f1", "std"),
+        roc_auc_mean=("roc_auc", "mean"), roc_auc_std=("roc_auc", "std"),
+        fit_seconds=("fit_seconds", "mean"), predict_ms_per_1k=("predict_ms_per_1k", "mean"),
+        folds=("fold", "count"),
+    )
+    for name, error in errors.items():
+        summary.loc[name, "error"] = error
+
+    print(f"Cross-validated {len(models)} models x {folds} folds in {time.perf_counter() - start:.1f}s.")
+    return summary.sort_values("f1_mean", ascending=False), per_fold
+
+
+# ==========================================
+# 4. FEATURE GROUPS OF A FITTED PREPROCESSOR
+# ==========================================
+def feature_groups(preprocessor):
+    # Original feature for every transformed column (one-hot columns fold back to their source)
+    if hasattr(preprocessor, "encoder_"):
+        # IncrementalPreprocessor (Telco_Incremental_Training.py)
+        groups = list(preprocessor.num_features)
+        for feature, categories in zip(preprocessor.cat_features, preprocessor.encoder_.categories_):
+            groups += [feature] * len(categories)
+        return np.array(groups)
+
+    groups = []
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder":
+            continue
+        if hasattr(transformer, "named_steps") and "encoder" in transformer.named_steps:
+            for feature, categories in zip(columns, transformer.named_steps["encoder"].categories_):
+                groups += [feature] * len(categories)
+        else:
+            groups += list(columns)
+    return np.array(groups)
+
+
+def group_matrix(groups):
+    # (transformed columns x features) 0/1 matrix: one matmul sums each feature's columns
+    features = list(dict.fromkeys(groups))
+    return features, (groups[:, None] == np.array(features)[None, :]).astype(float)
+
+
+# ==========================================
+# 5. PER-CUSTOMER LINEAR CONTRIBUTIONS
+# ==========================================
+def linear_contributions(pipeline, X, background=None, chunk_rows=EXPLAIN_CHUNK_ROWS):
+    """Each feature's share of the decision function (log-odds for logistic models).
+
+    contribution = coef * (x - background mean) per transformed column, summed back to
+    the original feature; base_value + the row's contributions = its decision value.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    if not hasattr(model, "coef_") or model.coef_.shape[0] != 1:
+        raise ValueError(f"{type(model).__name__} is not a binary linear model")
+
+    coef = model.coef_[0]
+    features, grouping = group_matrix(feature_groups(preprocessor))
+    weighted = coef[:, None] * grouping          # coef folded into the grouping matrix
+
+    if background is None:
+        background = preprocessor.transform(X.iloc[:chunk_rows]).mean(axis=0)
+    base_value = float(model.intercept_[0] + background @ coef)
+
+    chunks = []
+    for start in range(0, len(X), chunk_rows):
+        Xt = preprocessor.transform(X.iloc[start:start + chunk_rows])
+        chunks.append((Xt - background) @ weighted)
+
+    contributions = pd.DataFrame(np.vstack(chunks), index=X.index, columns=features)
+    contributions.insert(0, "base_value", base_value)
+    return contributions
+
+
+def top_reasons(contributions, n=3):
+    # Names of the n features pushing each customer hardest towards churn
+    values = contributions.drop(columns="base_value")
+    order = np.argsort(-values.to_numpy(), axis=1)[:, :n]
+    names = values.columns.to_numpy()[order]
+    return pd.DataFrame(names, index=contributions.index, columns=[f"reason_{i + 1}" for i in range(n)])
+
+
+# ==========================================
+# 6. PERMUTATION IMPORTANCE (ONE FEATURE PER TASK)
+# ==========================================
+def permute_feature(feature, columns, n_repeats, baseline, seed):
+    rng = np.random.default_rng(seed)
+    X = _X.copy()
+    drops = []
+    for _ in range(n_repeats):
+        # Shuffling the whole one-hot block keeps each permuted row a valid encoding
+        X[:, columns] = _X[rng.permutation(len(_X))][:, columns]
+        drops.append(baseline - roc_auc_score(_y, _model.predict_proba(X)[:, 1]))
+        X[:, columns] = _X[:, columns]
+    return feature, float(np.mean(drops)), float(np.std(drops))
+
+
+def permutation_importance(pipeline, X, y, n_repeats=PERMUTATION_REPEATS, jobs=None, seed=CV_SEED):
+    # Works for any model with predict_proba; ROC-AUC drop when a feature's values are shuffled
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    Xt = np.asarray(preprocessor.transform(X), dtype=float)
+    y = np.asarray(y)
+    baseline = roc_auc_score(y, model.predict_proba(Xt)[:, 1])
+    groups = feature_groups(preprocessor)
+
+    with SharedMatrix(Xt) as x_block, SharedMatrix(y) as y_block, \
+            ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                initargs=(x_block.spec, y_block.spec, model)) as pool:
+        futures = [
+            pool.submit(permute_feature, feature, np.flatnonzero(groups == feature), n_repeats, baseline, seed + i)
+            for i, feature in enumerate(dict.fromkeys(groups))
+        ]
+        results = [future.result() for future in futures]
+
+    importance = pd.DataFrame(results, columns=["feature", "importance_mean", "importance_std"])
+    return importance.sort_values("importance_mean", ascending=False).reset_index(drop=True), baseline
+
+
+# ==========================================
+# 7. MAIN EXECUTION (EXPLAIN THE CUSTOMER BASE)
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain the registered churn model over the whole snapshot.")
+    parser.add_argument("--method", choices=["auto", "linear", "permutation"], default="auto",
+                        help="auto: per-customer contributions for linear models, permutation importance otherwise")
+    parser.add_argument("--version", type=int, help="registry version (defaults to the current model)")
+    parser.add_argument("--output", default="churn_attributions.csv")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--repeats", type=int, default=PERMUTATION_REPEATS)
+    args = parser.parse_args()
+
+    from Telco_Model_Registry import load_model
+    from Telco_Snapshot_Cache import load_snapshot
+
+    pipeline, entry = load_model(args.version)
+    df = load_snapshot(refresh="never").set_index("fact_id")
+    bool_cols = df.select_dtypes(include=['bool']).columns
+    df[bool_cols] = df[bool_cols].astype(int)
+    X, y = df.drop(columns=["churn"]), df["churn"]
+
+    model = pipeline.named_steps["model"]
+    linear = hasattr(model, "coef_") and model.coef_.shape[0] == 1
+    method = args.method if args.method != "auto" else ("linear" if linear else "permutation")
+
+    start = time.perf_counter()
+    if method == "linear":
+        contributions = linear_contributions(pipeline, X)
+        out = pd.concat([contributions, top_reasons(contributions)], axis=1)
+        out.to_csv(args.output)
+        print(f"Per-customer contributions for {len(out):,} customers ({entry['name']} v{entry['version']}) "
+              f"in {time.perf_counter() - start:.2f}s -> '{args.output}'.")
+        print(contributions.drop(columns="base_value").abs().mean().sort_values(ascending=False).round(4).to_string())
+    else:
+        importance, baseline = permutation_importance(pipeline, X, y, args.repeats, args.jobs)
+        importance.to_csv(args.output, index=False)
+        print(f"Permutation importance ({entry['name']} v{entry['version']}, baseline ROC-AUC {baseline:.4f}) "
+              f"in {time.perf_counter() - start:.2f}s -> '{args.output}'.")
+        print(importance.round(4).to_string(index=False))
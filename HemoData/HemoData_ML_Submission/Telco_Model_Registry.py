@@ -0,0 +1,129 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+# Only stdlib at import time: joblib (and through it numpy / sklearn) loads
+# when a model is actually read or written
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_registry")
+MANIFEST = os.path.join(REGISTRY_DIR, "manifest.json")
+
+
+# ==========================================
+# 2. MANIFEST
+# ==========================================
+def read_manifest():
+    if not os.path.exists(MANIFEST):
+        return {"current": None, "models": []}
+    with open(MANIFEST) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest):
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_entry(version=None):
+    # Defaults to the current (last registered or promoted) version
+    manifest = read_manifest()
+    version = version or manifest["current"]
+    for entry in manifest["models"]:
+        if entry["version"] == version:
+            return entry
+    return None
+
+
+# ==========================================
+# 3. REGISTER / LOAD
+# ==========================================
+def register_model(pipeline, name, metrics, features, promote=True):
+    import joblib
+
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    manifest = read_manifest()
+    version = max((m["version"] for m in manifest["models"]), default=0) + 1
+    filename = f"v{version}_{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}.joblib"
+    path = os.path.join(REGISTRY_DIR, filename)
+
+    # Uncompressed, so load_model can memory-map the numpy arrays inside
+    joblib.dump(pipeline, path, compress=0)
+
+    entry = {
+        "version": version,
+        "name": name,
+        "file": filename,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "metrics": {k: float(v) for k, v in metrics.items()},
+        "features": features,
+        "sha256": file_hash(path),
+    }
+    manifest["models"].append(entry)
+    # Unpromoted versions are kept (and loadable by number) but scoring keeps the current one
+    if promote or manifest["current"] is None:
+        manifest["current"] = version
+    write_manifest(manifest)
+    return entry
+
+
+def load_model(version=None, verify=False, mmap_mode="r"):
+    entry = get_entry(version)
+    if entry is None:
+        raise FileNotFoundError(f"No registered model (version={version or 'current'}) in {REGISTRY_DIR}")
+
+    path = os.path.join(REGISTRY_DIR, entry["file"])
+    if verify and file_hash(path) != entry["sha256"]:
+        raise ValueError(f"{entry['file']} does not match the hash recorded in the manifest")
+
+    # Arrays are mapped read-only: worker processes share one copy in the page cache
+    import joblib
+    return joblib.load(path, mmap_mode=mmap_mode), entry
+
+
+def promote(version):
+    manifest = read_manifest()
+    if not any(m["version"] == version for m in manifest["models"]):
+        raise ValueError(f"Unknown model version {version}")
+    manifest["current"] = version
+    write_manifest(manifest)
+
+
+# ==========================================
+# 4. MAIN EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List registered churn models or change the current one.")
+    parser.add_argument("--promote", type=int, help="make this version the one scoring loads")
+    parser.add_argument("--verify", action="store_true", help="re-hash every artifact against the manifest")
+    args = parser.parse_args()
+
+    if args.promote:
+        promote(args.promote)
+
+    manifest = read_manifest()
+    print(f"{'Ver':>4} | {'Model':<20} | {'F1':<7} | {'ROC-AUC':<7} | {'Created':<19} | File")
+    print("-" * 90)
+    for m in manifest["models"]:
+        marker = "*" if m["version"] == manifest["current"] else " "
+        status = ""
+        if args.verify:
+            ok = file_hash(os.path.join(REGISTRY_DIR, m["file"])) == m["sha256"]
+            status = "  OK" if ok else "  HASH MISMATCH"
+        print(f"{marker}{m['version']:>3} | {m['name']:<20} | {m['metrics'].get('f1', 0):.4f}  | "
+              f"{m['metrics'].get('roc_auc', 0):.4f}  | {m['created']:<19} | {m['file']}{status}")
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Telco_Churn_Prediction import load_best_model
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+MAX_BATCH = 256          # requests scored together in one predict_proba call
+MAX_WAIT_MS = 2.0        # how long the first request of a batch waits for company
+LATENCY_WINDOW = 10000   # recent requests kept for p50 / p99
+
+# Same defaults as the console form for services the caller does not send
+FEATURE_DEFAULTS = {
+    "tenure": 0, "monthly_charges": 0.0, "total_charges": 0.0,
+    "senior_citizen": 0, "partner": 0, "dependents": 0,
+    "phone_service": 0, "paperless_billing": 0,
+    "gender": "Male", "contract": "Month-to-month",
+    "payment_method": "Electronic check", "internet_service": "No",
+    "multiple_lines": "No", "online_security": "No", "online_backup": "No",
+    "device_protection": "No", "tech_support": "No",
+    "streaming_tv": "No", "streaming_movies": "No",
+}
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+def coerce_customer(customer):
+    # Bad fields are caught per request, so they never reach (and fail) a shared batch
+    row = dict(FEATURE_DEFAULTS)
+    for name, value in customer.items():
+        if name not in FEATURE_DEFAULTS:
+            continue  # extra fields (e.g. customerID) are not model inputs
+        default = FEATURE_DEFAULTS[name]
+        if isinstance(default, str):
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string")
+            row[name] = value
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number") from None
+        if isinstance(value, bool) or not np.isfinite(number) or number < 0:
+            raise ValueError(f"{name} must be a non-negative number")
+        if isinstance(default, int):
+            if number != int(number) or (name != "tenure" and number not in (0, 1)):
+                raise ValueError(f"{name} must be {'a whole number' if name == 'tenure' else '0 or 1'}")
+            number = int(number)
+        row[name] = number
+    return row
+
+
+# ==========================================
+# 2. MICRO-BATCHING SCORER
+# ==========================================
+class MicroBatchScorer:
+
+    def __init__(self, pipeline, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        # One thread: batches are scored in order and the event loop stays free
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.churn_index = list(pipeline.classes_).index(1)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+
+    def score(self, rows):
+        proba = self.pipeline.predict_proba(pd.DataFrame(rows, columns=list(FEATURE_DEFAULTS)))
+        return proba[:, self.churn_index]
+
+    def score_each(self, rows):
+        results = []
+        for row in rows:
+            try:
+                results.append(self.score([row])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def predict(self, customer):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(({**FEATURE_DEFAULTS, **customer}, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+
+            # Collect whatever else arrives within the wait window
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            rows, futures = zip(*batch)
+            try:
+                probabilities = await loop.run_in_executor(self.executor, self.score, rows)
+            except Exception:
+                # Re-score row by row so one bad row only fails its own request
+                probabilities = await loop.run_in_executor(self.executor, self.score_each, rows)
+
+            self.batch_sizes.append(len(batch))
+            for future, probability in zip(futures, probabilities):
+                # The caller may have gone away (cancelled) while the batch was scored
+                if future.done():
+                    continue
+                if isinstance(probability, Exception):
+                    future.set_exception(probability)
+                else:
+                    future.set_result(float(probability))
+
+    def record(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds * 1000)
+
+    def stats(self):
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "requests": self.requests,
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+            "latency_ms_p99": round(float(np.percentile(latencies, 99)), 3),
+            "mean_batch_size": round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+        }
+
+
+# ==========================================
+# 3. HTTP (KEEP-ALIVE, JSON ONLY)
+# ==========================================
+def response(status, payload):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+async def handle(scorer, method, path, body):
+    if path == "/health":
+        return 200, {"status": "ok"}
+    if path == "/metrics":
+        return 200, scorer.stats()
+    if path != "/predict":
+        return 404, {"error": f"unknown path {path}"}
+    if method != "POST":
+        return 405, {"error": "use POST"}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return 400, {"error": "body must be JSON"}
+
+    # One customer object, or a list of them
+    customers = payload if isinstance(payload, list) else [payload]
+    if not all(isinstance(c, dict) for c in customers):
+        return 400, {"error": "expected a customer object or a list of them"}
+
+    try:
+        rows = [coerce_customer(c) for c in customers]
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    try:
+        probabilities = await asyncio.gather(*(scorer.predict(row) for row in rows))
+    except Exception as e:
+        return 500, {"error": f"scoring failed: {e}"}
+    results = [{"churn_probability": p, "churn_prediction": int(p >= 0.5)} for p in probabilities]
+    return 200, results if isinstance(payload, list) else results[0]
+
+
+async def serve_client(scorer, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            start = time.perf_counter()
+            status, payload = await handle(scorer, method, path, body)
+            if path == "/predict" and status == 200:
+                scorer.record(time.perf_counter() - start)
+
+            writer.write(response(status, payload))
+            await writer.drain()
+
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main(host, port):
+    # Loaded once and kept warm for the life of the service
+    pipeline, model_name = load_best_model()
+    scorer = MicroBatchScorer(pipeline)
+    scorer.score([FEATURE_DEFAULTS])
+
+    batcher = asyncio.create_task(scorer.run())
+    server = await asyncio.start_server(lambda r, w: serve_client(scorer, r, w), host, port)
+    print(f"Scoring service for {model_name} listening on http://{host}:{port}/predict")
+
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+# ==========================================
+# 4. MAIN EXECUTION
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve churn predictions over HTTP with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.host, args.port))
@@ -0,0 +1,193 @@
+import json
+import os
+import sys
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Shared DB backend layer (SQL Server / SQLite / DuckDB) lives with the ETL
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "HemoDataSubmission"))
+from CleaningSchema import TELCO_SCHEMA
+from DBBackend import get_backend
+
+# ==========================================
+# 1. CONFIG
+# ==========================================
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot_cache")
+MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+
+# The star join behind training (fetch_data) and profiling (EDA.py); fact_id drives incremental refresh
+STAR_JOIN_QUERY = """
+    SELECT
+        f.fact_id,
+        f.churn, f.tenure, f.contract, f.paperless_billing, f.payment_method,
+        CAST(f.total_charges AS FLOAT) as total_charges,
+        c.gender, c.senior_citizen, c.partner, c.dependents,
+        s.phone_service, s.multiple_lines, s.internet_service,
+        s.online_security, s.online_backup, s.device_protection,
+        s.tech_support, s.streaming_tv, s.streaming_movies,
+        CAST(s.monthly_charges AS FLOAT) as monthly_charges
+    FROM telco.fact_subscription f
+    JOIN telco.dim_customer c ON f.customer_dim_id = c.customer_dim_id
+    JOIN telco.dim_service s  ON f.service_dim_id = s.service_dim_id
+"""
+
+WATERMARK_QUERY = """
+    SELECT
+        (SELECT COALESCE(MAX(fact_id), 0) FROM telco.fact_subscription),
+        (SELECT COUNT(*) FROM telco.fact_subscription),
+        (SELECT COALESCE(MAX(customer_dim_id), 0) FROM telco.dim_customer),
+        (SELECT COALESCE(MAX(service_dim_id), 0) FROM telco.dim_service)
+"""
+
+
+def category_code(column, schema_name):
+    # Text columns enter the checksum as their position in the schema domain (portable SQL)
+    cases = " ".join(f"WHEN '{v}' THEN {i + 1}" for i, v in enumerate(TELCO_SCHEMA[schema_name]["domain"]))
+    return f"CASE {column} {cases} ELSE 0 END"
+
+
+# MERGE loads update facts and customers in place, which moves neither the ids nor the
+# counts. A position-weighted sum over every updatable column catches those edits; the
+# (id % 997 + 1) weight keeps it far inside BIGINT and still notices values swapped between rows.
+CHECKSUM_QUERY = f"""
+    SELECT
+        (SELECT COALESCE(SUM(CAST(fact_id % 997 + 1 AS BIGINT) * (
+            COALESCE(service_dim_id, 0) * 7 + COALESCE(tenure, 0) * 11
+            + COALESCE(CAST(churn AS INT), 0) * 13 + COALESCE(CAST(paperless_billing AS INT), 0) * 17
+            + CAST(COALESCE(total_charges, 0) * 100 AS BIGINT) * 19
+            + ({category_code("contract", "Contract")}) * 23
+            + ({category_code("payment_method", "PaymentMethod")}) * 29
+        )), 0) FROM telco.fact_subscription WHERE fact_id <= {{max_fact_id}}),
+        (SELECT COALESCE(SUM(CAST(customer_dim_id % 997 + 1 AS BIGINT) * (
+            ({category_code("gender", "gender")}) + COALESCE(CAST(senior_citizen AS INT), 0) * 3
+            + COALESCE(CAST(partner AS INT), 0) * 5 + COALESCE(CAST(dependents AS INT), 0) * 7
+        )), 0) FROM telco.dim_customer WHERE customer_dim_id <= {{max_customer_id}})
+"""
+
+# ==========================================
+# 2. WATERMARK & MANIFEST
+# ==========================================
+def checksums(backend, conn, watermark):
+    # Over the rows up to the given ids, so a cached snapshot can be checked before appending to it
+    row = backend.read_sql(CHECKSUM_QUERY.format(**watermark), conn).iloc[0]
+    return {"fact_checksum": int(row.iloc[0]), "customer_checksum": int(row.iloc[1])}
+
+
+def current_watermark(backend, conn):
+    row = backend.read_sql(WATERMARK_QUERY, conn).iloc[0]
+    watermark = {
+        "max_fact_id": int(row.iloc[0]),
+        "fact_count": int(row.iloc[1]),
+        "max_customer_id": int(row.iloc[2]),
+        "max_service_id": int(row.iloc[3]),
+    }
+    return {**watermark, **checksums(backend, conn, watermark)}
+
+
+def read_manifest():
+    if not os.path.exists(MANIFEST):
+        return None
+    with open(MANIFEST) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest):
+    # Written last and swapped atomically: a crashed refresh leaves the old snapshot intact
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST)
+
+
+# ==========================================
+# 3. WRITE / READ ARROW IPC PARTS
+# ==========================================
+def write_part(df, name):
+    # Uncompressed IPC file format, so readers can memory-map it
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = os.path.join(CACHE_DIR, name)
+    with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return name
+
+
+def read_table(manifest):
+    # Memory-mapped and zero-copy: several processes share the page cache
+    tables = []
+    for name in manifest["parts"]:
+        with pa.memory_map(os.path.join(CACHE_DIR, name), "r") as source:
+            tables.append(ipc.open_file(source).read_all())
+    return pa.concat_tables(tables) if tables else None
+
+
+# ==========================================
+# 4. LOAD (REFRESHING ONLY WHAT CHANGED)
+# ==========================================
+def load_snapshot_table(refresh="auto"):
+    """Return the star join as an Arrow table.
+
+    refresh: "auto" (append new facts, rebuild if rows were removed or updated), "full"
+    (always rebuild) or "never" (use the cached snapshot without asking the DB).
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest = read_manifest()
+
+    if refresh == "never" and manifest:
+        return read_table(manifest)
+
+    backend = get_backend()
+    with backend.connection() as conn:
+        watermark = current_watermark(backend, conn)
+
+        if refresh == "auto" and manifest and manifest["watermark"] == watermark:
+            print("Snapshot cache is current.")
+            return read_table(manifest)
+
+        cached = manifest["watermark"] if manifest else None
+        appended_only = (
+            refresh == "auto" and cached is not None
+            and watermark["max_fact_id"] > cached["max_fact_id"]
+            and watermark["fact_count"] > cached["fact_count"]
+            # Rows already in the snapshot must be untouched (no merge updates since)
+            and checksums(backend, conn, cached) == {k: cached.get(k) for k in ("fact_checksum", "customer_checksum")}
+        )
+
+        if appended_only:
+            print(f"Refreshing snapshot: facts after fact_id {cached['max_fact_id']}...")
+            new = backend.read_sql(f"{STAR_JOIN_QUERY} WHERE f.fact_id > {cached['max_fact_id']}", conn)
+
+            # Anything other than pure appends (deletes, re-keyed facts) forces a rebuild
+            if cached["fact_count"] + len(new) == watermark["fact_count"]:
+                name = write_part(new, f"part-{cached['max_fact_id'] + 1}-{watermark['max_fact_id']}.arrow")
+                manifest = {"watermark": watermark, "parts": manifest["parts"] + [name]}
+                write_manifest(manifest)
+                return read_table(manifest)
+
+        print("Rebuilding snapshot from the database...")
+        df = backend.read_sql(STAR_JOIN_QUERY, conn)
+
+    old_parts = manifest["parts"] if manifest else []
+    name = write_part(df, f"part-1-{watermark['max_fact_id']}.arrow")
+    write_manifest({"watermark": watermark, "parts": [name]})
+
+    for part in old_parts:
+        if part != name:
+            os.remove(os.path.join(CACHE_DIR, part))
+
+    return read_table(read_manifest())
+
+
+def load_snapshot(refresh="auto", columns=None):
+    table = load_snapshot_table(refresh)
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+# ==========================================
+# 5. MANUAL REFRESH
+# ==========================================
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "auto"
+    table = load_snapshot_table(refresh=mode)
+    print(f"Snapshot ready: {table.num_rows} rows, {len(table.column_names)} columns in '{CACHE_DIR}'.")